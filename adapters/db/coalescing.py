@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from adapters.db.base import DBAdapter
+
+Rows = Tuple[List[Tuple[Any, ...]], List[str]]
+
+
+class CoalescingDBAdapter(DBAdapter):
+    """
+    Wraps a DBAdapter so concurrent identical `execute(sql)` calls share one
+    round trip: the first caller runs the query, later callers with the same
+    SQL wait for its result (or exception) instead of hitting the DB again.
+    Followers get their own copy of the rows/columns lists.
+
+    Nothing is cached once the query finishes, so results are never stale.
+    Everything else is delegated to the wrapped adapter unchanged. Share one
+    instance per database across requests (see `shared_coalescing_adapter`).
+    """
+
+    def __init__(self, inner: DBAdapter):
+        self.inner = inner
+        self.name = inner.name
+        self.dialect = inner.dialect
+        self._inflight: Dict[str, "Future[Rows]"] = {}
+        self._lock = threading.Lock()
+
+    def preview_schema(self, limit_per_table: int = 0) -> str:
+        return self.inner.preview_schema(limit_per_table)
+
+    def derive_schema_preview(self) -> str:
+        return self.inner.derive_schema_preview()
+
+    def explain_query_plan(self, sql: str) -> List[str]:
+        return self.inner.explain_query_plan(sql)
+
+    def execute(self, sql: str) -> Rows:
+        with self._lock:
+            fut = self._inflight.get(sql)
+            leader = fut is None
+            if fut is None:
+                fut = self._inflight[sql] = Future()
+        if not leader:
+            rows, columns = fut.result()
+            return list(rows), list(columns)
+
+        try:
+            result = self.inner.execute(sql)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(sql, None)
+
+    def __getattr__(self, item: str) -> Any:
+        # Adapter-specific extras (e.g. `path`, `dsn`) pass through.
+        if item == "inner":
+            raise AttributeError(item)
+        return getattr(self.inner, item)
+
+
+# Process-wide wrappers, one per database key; see `shared_coalescing_adapter`.
+_SHARED_MAX = 256
+_SHARED: "OrderedDict[Tuple[str, str], CoalescingDBAdapter]" = OrderedDict()
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_coalescing_adapter(
+    key: Tuple[str, str], make: Callable[[], DBAdapter]
+) -> CoalescingDBAdapter:
+    """
+    Process-wide CoalescingDBAdapter for the database `key` (e.g.
+    ("sqlite", path)), wrapping `make()` on first use.
+
+    Adapters are selected per request; only a shared wrapper can coalesce
+    identical queries of concurrent requests. At most `_SHARED_MAX` databases
+    are kept (least recently used dropped; in-flight queries are unaffected).
+    """
+    with _SHARED_LOCK:
+        db = _SHARED.get(key)
+        if db is None:
+            db = _SHARED[key] = CoalescingDBAdapter(make())
+            while len(_SHARED) > _SHARED_MAX:
+                _SHARED.popitem(last=False)
+        else:
+            _SHARED.move_to_end(key)
+        return db
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Literal
+from typing import Iterable, Literal, Tuple
 
 PipelineStatus = Literal["ok", "error", "ambiguous"]
 RepairOutcome = Literal["attempt", "success", "failed", "skipped"]
@@ -11,6 +11,13 @@ class Metrics(ABC):
     @abstractmethod
     def observe_stage_duration_ms(self, *, stage: str, dt_ms: float) -> None: ...
 
+    def observe_stage_durations_ms(
+        self, observations: Iterable[Tuple[str, float]]
+    ) -> None:
+        """Record a batch of (stage, dt_ms) observations, e.g. once per pipeline run."""
+        for stage, dt_ms in observations:
+            self.observe_stage_duration_ms(stage=stage, dt_ms=dt_ms)
+
     @abstractmethod
     def inc_pipeline_run(self, *, status: PipelineStatus) -> None: ...
 
@@ -25,3 +32,7 @@ class Metrics(ABC):
 
     @abstractmethod
     def inc_repair_attempt(self, *, stage: str, outcome: RepairOutcome) -> None: ...
+
+    def inc_cache_hit(self, *, cache: str) -> None:
+        """Count a pipeline cache hit (result/semantic/plan/stage/detector/reject)."""
+        return
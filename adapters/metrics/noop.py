@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Iterable, Tuple
+
 from adapters.metrics.base import Metrics, PipelineStatus, RepairOutcome
 
 
@@ -7,6 +9,11 @@ class NoOpMetrics(Metrics):
     def observe_stage_duration_ms(self, *, stage: str, dt_ms: float) -> None:
         return
 
+    def observe_stage_durations_ms(
+        self, observations: Iterable[Tuple[str, float]]
+    ) -> None:
+        return
+
     def inc_pipeline_run(self, *, status: PipelineStatus) -> None:
         return
 
@@ -21,3 +28,6 @@ class NoOpMetrics(Metrics):
 
     def inc_repair_attempt(self, *, stage: str, outcome: RepairOutcome) -> None:
         return
+
+    def inc_cache_hit(self, *, cache: str) -> None:
+        return
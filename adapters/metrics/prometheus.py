@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Dict, Iterable, Tuple
+
 from prometheus_client import Counter, Histogram
 from nl2sql.prom import REGISTRY
 
@@ -101,16 +103,56 @@ cache_events_total = Counter(
     registry=REGISTRY,
 )
 
+pipeline_cache_hits_total = Counter(
+    "pipeline_cache_hits_total",
+    "Pipeline-internal cache hits labeled by cache",
+    ["cache"],
+    registry=REGISTRY,
+)
+
+
+# Label-bound children, shared by all PrometheusMetrics instances (the service
+# creates one per request). Filled at import for the known label values below
+# and lazily for any others; `.labels()` returns the same child either way.
+_STAGE_DURATION: Dict[str, Histogram] = {}
+_PIPELINE_RUNS: Dict[str, Counter] = {}
+_STAGE_CALLS: Dict[Tuple[str, bool], Counter] = {}
+_REPAIR_ATTEMPTS: Dict[Tuple[str, str], Counter] = {}
+_CACHE_HITS: Dict[str, Counter] = {}
+
+
+def _stage_duration_child(stage: str) -> Histogram:
+    child = _STAGE_DURATION.get(stage)
+    if child is None:
+        child = _STAGE_DURATION[stage] = stage_duration_ms.labels(stage=stage)
+    return child
+
 
 class PrometheusMetrics(Metrics):
     def observe_stage_duration_ms(self, *, stage: str, dt_ms: float) -> None:
-        stage_duration_ms.labels(stage=stage).observe(float(dt_ms))
+        _stage_duration_child(stage).observe(dt_ms)
+
+    def observe_stage_durations_ms(
+        self, observations: Iterable[Tuple[str, float]]
+    ) -> None:
+        child = _stage_duration_child
+        for stage, dt_ms in observations:
+            child(stage).observe(dt_ms)
 
     def inc_pipeline_run(self, *, status: PipelineStatus) -> None:
-        pipeline_runs_total.labels(status=status).inc()
+        child = _PIPELINE_RUNS.get(status)
+        if child is None:
+            child = _PIPELINE_RUNS[status] = pipeline_runs_total.labels(status=status)
+        child.inc()
 
     def inc_stage_call(self, *, stage: str, ok: bool) -> None:
-        stage_calls_total.labels(stage=stage, ok=("true" if ok else "false")).inc()
+        key = (stage, ok)
+        child = _STAGE_CALLS.get(key)
+        if child is None:
+            child = _STAGE_CALLS[key] = stage_calls_total.labels(
+                stage=stage, ok=("true" if ok else "false")
+            )
+        child.inc()
 
     def inc_stage_error(self, *, stage: str, error_code: str) -> None:
         stage_errors_total.labels(stage=stage, error_code=str(error_code)).inc()
@@ -119,7 +161,19 @@ class PrometheusMetrics(Metrics):
         repair_trigger_total.labels(stage=stage, reason=str(reason)).inc()
 
     def inc_repair_attempt(self, *, stage: str, outcome: RepairOutcome) -> None:
-        repair_attempts_total.labels(stage=stage, outcome=outcome).inc()
+        key = (stage, outcome)
+        child = _REPAIR_ATTEMPTS.get(key)
+        if child is None:
+            child = _REPAIR_ATTEMPTS[key] = repair_attempts_total.labels(
+                stage=stage, outcome=outcome
+            )
+        child.inc()
+
+    def inc_cache_hit(self, *, cache: str) -> None:
+        child = _CACHE_HITS.get(cache)
+        if child is None:
+            child = _CACHE_HITS[cache] = pipeline_cache_hits_total.labels(cache=cache)
+        child.inc()
 
 
 # -----------------------------------------------------------------------------
@@ -130,11 +184,16 @@ for ok in ("true", "false"):
     verifier_checks_total.labels(ok=ok).inc(0)
 
 for status in ("ok", "error", "ambiguous"):
-    pipeline_runs_total.labels(status=status).inc(0)
+    _PIPELINE_RUNS[status] = pipeline_runs_total.labels(status=status)
+    _PIPELINE_RUNS[status].inc(0)
 
 for hit in ("true", "false"):
     cache_events_total.labels(hit=hit).inc(0)
 
+for cache in ("result", "semantic", "plan", "stage", "detector", "reject"):
+    _CACHE_HITS[cache] = pipeline_cache_hits_total.labels(cache=cache)
+    _CACHE_HITS[cache].inc(0)
+
 # Prime Day 3 series
 for stage in (
     "detector",
@@ -145,10 +204,17 @@ for stage in (
     "verifier",
     "repair",
 ):
-    for ok in ("true", "false"):
-        stage_calls_total.labels(stage=stage, ok=ok).inc(0)
+    _stage_duration_child(stage)
+    for flag in (True, False):
+        _STAGE_CALLS[(stage, flag)] = stage_calls_total.labels(
+            stage=stage, ok=("true" if flag else "false")
+        )
+        _STAGE_CALLS[(stage, flag)].inc(0)
     for outcome in ("attempt", "success", "failed", "skipped"):
-        repair_attempts_total.labels(stage=stage, outcome=outcome).inc(0)
+        _REPAIR_ATTEMPTS[(stage, outcome)] = repair_attempts_total.labels(
+            stage=stage, outcome=outcome
+        )
+        _REPAIR_ATTEMPTS[(stage, outcome)].inc(0)
 
 for reason in ("semantic_failure", "unknown"):
     repair_trigger_total.labels(stage="verifier", reason=reason).inc(0)
@@ -1,10 +1,19 @@
+import importlib.util
 import os
 import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi.responses import PlainTextResponse, RedirectResponse, JSONResponse
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+)
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
+from nl2sql.cache import close_shared_caches
+from nl2sql.pipeline import shutdown_stage_pool
 from nl2sql.prom import REGISTRY
 from app.routers import dev, nl2sql
 from app.settings import get_settings
@@ -21,6 +30,21 @@ except Exception:
 
 settings = get_settings()
 
+# orjson is optional: when installed, JSON responses (trace lists are the bulk
+# of the payload) are rendered by its C encoder instead of stdlib json.
+DEFAULT_RESPONSE_CLASS: type[JSONResponse] = (
+    ORJSONResponse if importlib.util.find_spec("orjson") is not None else JSONResponse
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Process-wide resources shared by the per-request pipelines.
+    shutdown_stage_pool()
+    close_shared_caches()
+
+
 # ----------------------------------------------------------------------------
 #  App definition
 # ----------------------------------------------------------------------------
@@ -28,6 +52,8 @@ application = FastAPI(
     title="NL2SQL Copilot Prototype",
     version=settings.app_version,
     description="Convert natural language to safe & verified SQL",
+    default_response_class=DEFAULT_RESPONSE_CLASS,
+    lifespan=lifespan,
 )
 register_exception_handlers(application)
 
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Optional
 
+from adapters.db.coalescing import shared_coalescing_adapter
 from adapters.db.postgres_adapter import PostgresAdapter
 from adapters.db.sqlite_adapter import SQLiteAdapter
 from adapters.metrics.prometheus import PrometheusMetrics
@@ -38,20 +39,24 @@ class NL2SQLService:
     settings: Settings
 
     def _select_adapter(self, db_id: Optional[str]) -> Adapter:
+        # One shared coalescing wrapper per database, so identical queries of
+        # concurrent requests share a round trip.
         mode = self.settings.db_mode.lower()
 
         if mode == "postgres":
             dsn = (self.settings.postgres_dsn or "").strip()
             if not dsn:
                 raise PipelineConfigError("Postgres DSN is not configured")
-            return PostgresAdapter(dsn=dsn)
+            return shared_coalescing_adapter(
+                ("postgres", dsn), lambda: PostgresAdapter(dsn=dsn)
+            )
 
         if db_id:
             state.cleanup_stale_dbs()
             path = state.get_db_path(db_id)
             if not path:
                 raise DbNotFound(f"Could not resolve DB for db_id={db_id!r}")
-            return SQLiteAdapter(path=path)
+            return self._sqlite_adapter(path)
 
         # Allow tests (and deployments) to override the default DB path at runtime
         # even if Settings was instantiated before env vars were patched.
@@ -61,7 +66,14 @@ class NL2SQLService:
         if not Path(default_path).exists():
             raise DbNotFound(f"SQLite database path does not exist: {default_path!r}")
 
-        return SQLiteAdapter(path=default_path)
+        return self._sqlite_adapter(default_path)
+
+    @staticmethod
+    def _sqlite_adapter(path: str) -> Adapter:
+        resolved = str(Path(path).resolve())
+        return shared_coalescing_adapter(
+            ("sqlite", resolved), lambda: SQLiteAdapter(path=resolved)
+        )
 
     def get_schema_preview(
         self,
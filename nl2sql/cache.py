@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterator,
+    MutableMapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache-key form of a user query: whitespace collapsed, trailing punctuation
+    dropped. Case is kept, since it can belong to a literal ("named 'Smith'").
+    """
+    return " ".join(text.split()).rstrip("?!.;,").rstrip()
+
+
+class LRUCache(MutableMapping[K, V], Generic[K, V]):
+    """Bounded in-memory mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._store: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: K) -> V:
+        with self._lock:
+            value = self._store[key]
+            self._store.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def __delitem__(self, key: K) -> None:
+        with self._lock:
+            del self._store[key]
+
+    def __iter__(self) -> Iterator[K]:
+        with self._lock:
+            return iter(list(self._store))
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class TTLCache(MutableMapping[K, V], Generic[K, V]):
+    """
+    Bounded in-memory mapping whose entries expire `ttl` seconds after insert.
+
+    Suitable as an injected Pipeline cache backend. When full, the oldest
+    entry is evicted. Expired entries are dropped lazily on access.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._store: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: K) -> V:
+        with self._lock:
+            expires_at, value = self._store[key]
+            if time.monotonic() >= expires_at:
+                del self._store[key]
+                raise KeyError(key)
+            return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        with self._lock:
+            self._store.pop(key, None)
+            while self._store and len(self._store) >= self.maxsize:
+                self._store.popitem(last=False)
+            self._store[key] = (time.monotonic() + self.ttl, value)
+
+    def __delitem__(self, key: K) -> None:
+        with self._lock:
+            del self._store[key]
+
+    def __iter__(self) -> Iterator[K]:
+        now = time.monotonic()
+        with self._lock:
+            keys = [k for k, (exp, _) in self._store.items() if now < exp]
+        return iter(keys)
+
+    def __len__(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for exp, _ in self._store.values() if now < exp)
+
+
+class SQLiteCache(MutableMapping[K, V], Generic[K, V]):
+    """
+    Persistent mapping in a SQLite file (WAL mode) that several worker
+    processes on one host can share, e.g. as a `stage_cache`/`result_cache`.
+
+    Keys (str/bytes/numbers or tuples of them, as the pipeline uses) and
+    values are pickled; keys with a fixed protocol so their bytes are stable.
+    Entries live under `namespace`; bumping it invalidates old entries. With
+    `max_entries`, the oldest inserts of the namespace are evicted past it.
+    Values are unpickled on read, so the file must live in a trusted,
+    private directory.
+
+    One connection is shared by all threads of the process, so every
+    statement runs under `_lock`. Open it once per process (see
+    `shared_sqlite_cache`) and `close()` it on shutdown.
+    """
+
+    _KEY_PROTOCOL = 4
+
+    def __init__(
+        self, path: str, *, namespace: str = "", max_entries: Optional[int] = None
+    ) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "ns TEXT NOT NULL, k BLOB NOT NULL, v BLOB NOT NULL, PRIMARY KEY (ns, k))"
+            )
+
+    def _key(self, key: K) -> bytes:
+        return pickle.dumps(key, protocol=self._KEY_PROTOCOL)
+
+    def __getitem__(self, key: K) -> V:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT v FROM cache WHERE ns = ? AND k = ?",
+                (self.namespace, self._key(key)),
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key: K, value: V) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, k, v) VALUES (?, ?, ?)",
+                (self.namespace, self._key(key), blob),
+            )
+            if self.max_entries is not None:
+                # REPLACE re-inserts, so rowid order is insertion order.
+                self._conn.execute(
+                    "DELETE FROM cache WHERE ns = ? AND rowid <= ("
+                    "SELECT rowid FROM cache WHERE ns = ? "
+                    "ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+
+    def __delitem__(self, key: K) -> None:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND k = ?",
+                (self.namespace, self._key(key)),
+            )
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[K]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT k FROM cache WHERE ns = ?", (self.namespace,)
+            ).fetchall()
+        return iter([pickle.loads(k) for (k,) in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            (n,) = self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)
+            ).fetchone()
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide SQLiteCache instances, one per (path, namespace); see `shared_sqlite_cache`.
+_SHARED: Dict[Tuple[str, str], SQLiteCache[Any, Any]] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_sqlite_cache(
+    path: str, *, namespace: str = "", max_entries: Optional[int] = None
+) -> SQLiteCache[Any, Any]:
+    """
+    Process-wide SQLiteCache for `path` and `namespace`, opened on first use
+    (its directory is created owner-only; `max_entries` applies from then on).
+
+    Pipelines are built per request; sharing one instance keeps a single
+    connection per file instead of one per pipeline. Close all of them with
+    `close_shared_caches()` on shutdown.
+    """
+    key = (os.path.abspath(path), namespace)
+    with _SHARED_LOCK:
+        cache = _SHARED.get(key)
+        if cache is None:
+            os.makedirs(os.path.dirname(key[0]), mode=0o700, exist_ok=True)
+            cache = _SHARED[key] = SQLiteCache(
+                key[0], namespace=namespace, max_entries=max_entries
+            )
+        return cache
+
+
+def close_shared_caches() -> None:
+    """Close every cache opened by `shared_sqlite_cache` (reopened on next use)."""
+    with _SHARED_LOCK:
+        caches = list(_SHARED.values())
+        _SHARED.clear()
+    for cache in caches:
+        cache.close()
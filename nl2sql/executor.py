@@ -2,6 +2,7 @@ import sqlglot
 from sqlglot import exp
 
 import time
+from typing import ClassVar
 from nl2sql.types import StageResult, StageTrace
 from nl2sql.errors.codes import ErrorCode
 from adapters.db.base import DBAdapter
@@ -9,6 +10,8 @@ from adapters.db.base import DBAdapter
 
 class Executor:
     name = "executor"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset({"sql"})
 
     def __init__(self, db: DBAdapter):
         self.db = db
@@ -62,7 +65,7 @@ class Executor:
         return True, "ok", notes
 
     def run(self, sql: str) -> StageResult:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
 
         preflight_ok, preflight_reason, preflight_notes = self._preflight_cost_check(
             sql
@@ -70,7 +73,7 @@ class Executor:
         if not preflight_ok:
             trace = StageTrace(
                 stage=self.name,
-                duration_ms=(time.perf_counter() - t0) * 1000,
+                duration_ms=(time.perf_counter_ns() - t0) / 1_000_000,
                 summary="blocked",
                 notes={
                     **preflight_notes,
@@ -90,7 +93,7 @@ class Executor:
             rows, cols = self.db.execute(sql)
             trace = StageTrace(
                 stage=self.name,
-                duration_ms=(time.perf_counter() - t0) * 1000,
+                duration_ms=(time.perf_counter_ns() - t0) / 1_000_000,
                 notes={
                     "row_count": len(rows),
                     "col_count": len(cols),
@@ -105,7 +108,7 @@ class Executor:
         except Exception as e:
             trace = StageTrace(
                 stage=self.name,
-                duration_ms=(time.perf_counter() - t0) * 1000,
+                duration_ms=(time.perf_counter_ns() - t0) / 1_000_000,
                 notes={
                     "error": str(e),
                     "error_type": type(e).__name__,
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import time
-from typing import Optional, Dict, Any
+from typing import Any, ClassVar, Dict, Optional
 
 from adapters.llm.base import LLMProvider
 from nl2sql.errors.codes import ErrorCode
@@ -10,6 +10,17 @@ from nl2sql.types import StageResult, StageTrace
 
 class Generator:
     name = "generator"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset(
+        {
+            "user_query",
+            "schema_preview",
+            "plan_text",
+            "constraints",
+            "clarify_answers",
+            "traces",
+        }
+    )
 
     def __init__(self, llm: LLMProvider) -> None:
         self.llm = llm
@@ -24,7 +35,7 @@ class Generator:
         clarify_answers: Optional[Dict[str, Any]] = None,
         traces: Optional[list[dict]] = None,
     ) -> StageResult:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
 
         try:
             res = self.llm.generate_sql(
@@ -84,7 +95,7 @@ class Generator:
         trace = StageTrace(
             stage=self.name,
             summary="Generated SQL",
-            duration_ms=(time.perf_counter() - t0) * 1000.0,
+            duration_ms=(time.perf_counter_ns() - t0) / 1_000_000,
             token_in=t_in,
             token_out=t_out,
             cost_usd=cost,
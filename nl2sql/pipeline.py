@@ -1,8 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
 import traceback
-from dataclasses import dataclass
-from typing import Dict, Any, Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import (
+    Dict,
+    Any,
+    Optional,
+    List,
+    Callable,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    Tuple,
+)
 import time
 import inspect
 
@@ -20,9 +40,166 @@ from adapters.metrics.noop import NoOpMetrics
 from nl2sql.errors.codes import ErrorCode
 from nl2sql.context_engineering.render import render_schema_pack
 from nl2sql.context_engineering.engineer import ContextEngineer
+from nl2sql.semantic_cache import Probe, SemanticCache
+from nl2sql.cache import normalize_query, shared_sqlite_cache
 
 
-@dataclass(frozen=True)
+class LazyTraceback:
+    """
+    Exception traceback that is only formatted when turned into a string.
+    Stored in `StageResult.traceback` so failed stages don't pay for
+    formatting a traceback nobody reads.
+    """
+
+    __slots__ = ("_exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self._exc = exc
+
+    def __str__(self) -> str:
+        exc = self._exc
+        return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+
+    def __repr__(self) -> str:
+        return f"LazyTraceback({self._exc!r})"
+
+
+_NS_PER_MS = 1_000_000
+
+
+def _pool_workers_from_env() -> int:
+    """`NL2SQL_POOL_WORKERS`, validated; read once at import so bad values fail at startup."""
+    raw = os.getenv("NL2SQL_POOL_WORKERS", "").strip()
+    if not raw:
+        # Stage calls wait on LLM/DB I/O, so size for concurrent requests (the
+        # FastAPI/anyio threadpool runs up to 40), not for the CPU count.
+        return 64
+    try:
+        workers = int(raw)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ValueError(f"NL2SQL_POOL_WORKERS must be a positive integer, got {raw!r}")
+    return workers
+
+
+# Process-wide pool for speculative stage overlap (see `Pipeline._get_pool`).
+_POOL_WORKERS = _pool_workers_from_env()
+_STAGE_POOL: Optional[ThreadPoolExecutor] = None
+_STAGE_POOL_LOCK = threading.Lock()
+
+# Size bound of the `cache_dir` stage memo (oldest entries evicted first).
+_PERSISTENT_CACHE_ENTRIES = 100_000
+
+# Canonical (interned) stage names; stage-reported names are mapped onto these.
+_STAGE_NAMES: Dict[str, str] = {
+    s: sys.intern(s)
+    for s in (
+        "detector",
+        "planner",
+        "generator",
+        "safety",
+        "executor",
+        "verifier",
+        "repair",
+        "pipeline",
+    )
+}
+
+# Shared read-only fallback for stage results without dict data.
+_EMPTY_DATA: Mapping[str, Any] = MappingProxyType({})
+# Shared read-only notes for traces without notes; replaced (never mutated) on write.
+_EMPTY_NOTES: Mapping[str, Any] = MappingProxyType({})
+# Field defaults for `Pipeline._finalize`: a non-ok, non-ambiguous, empty result.
+_RESULT_DEFAULTS: Mapping[str, Any] = MappingProxyType(
+    {
+        "ok": False,
+        "ambiguous": False,
+        "error": False,
+        "details": None,
+        "sql": None,
+        "rationale": None,
+        "verified": None,
+        "questions": None,
+    }
+)
+
+RepairInputBuilder = Callable[[StageResult, Dict[str, Any]], Dict[str, Any]]
+# One unrecorded stage attempt: (result, cache note, duration ms); see `_attempt_stage`.
+StageAttempt = Tuple[StageResult, Optional[str], float]
+# (planner data, generator data) reused by the semantic plan cache.
+PlanEntry = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def shutdown_stage_pool(wait: bool = True) -> None:
+    """Shut down the shared stage pool (e.g. on app shutdown); recreated on next use."""
+    global _STAGE_POOL
+    with _STAGE_POOL_LOCK:
+        pool, _STAGE_POOL = _STAGE_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def _stage_kwargs(*names: str):
+    """Declare the kwargs of a pipeline-internal stage callable (see `_declared_kwargs`)."""
+
+    def mark(fn):
+        fn.ACCEPTED_KWARGS = frozenset(names)
+        return fn
+
+    return mark
+
+
+def _str_keys(obj: Any) -> Any:
+    """`obj` with every dict key stringified (mixed key types can't be sorted)."""
+    if isinstance(obj, dict):
+        return {str(k): _str_keys(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_str_keys(v) for v in obj]
+    return obj
+
+
+def _canonical_json(payload: Any) -> bytes:
+    """
+    Deterministic JSON bytes (string keys, sorted) for hashing. One serializer
+    with fixed options, since keys may be persisted (`cache_dir`) and must not
+    depend on which optional packages are installed.
+    """
+    return json.dumps(
+        _str_keys(payload),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    ).encode("utf-8")
+
+
+@dataclass(slots=True)
+class _Trace:
+    """Pipeline-internal trace record; turned into a dict once, in `_normalize_traces`."""
+
+    stage: str
+    duration_ms: float
+    summary: str
+    notes: Mapping[str, Any]
+    token_in: Optional[int] = None
+    token_out: Optional[int] = None
+    cost_usd: Optional[float] = None
+
+
+@dataclass(slots=True)
+class _PlanLookup:
+    """Plan-cache lookup state for one run (keys are kept for the later store)."""
+
+    exact_key: Optional[bytes] = None
+    scope: bytes = b""
+    vec: Optional[Probe] = None
+    entry: Optional[PlanEntry] = None
+    notes: Optional[Dict[str, Any]] = None
+    exact: bool = False
+
+
+@dataclass(frozen=True, slots=True)
 class FinalResult:
     ok: bool
     ambiguous: bool
@@ -46,6 +223,15 @@ class Pipeline:
     """
 
     SQL_REPAIR_STAGES = {"safety", "executor", "verifier"}
+    # Pure stages whose ok results may be reused for identical inputs.
+    MEMO_STAGES = frozenset({"planner", "generator", "safety"})
+    # Deterministic stages whose rejections may be reused for identical inputs.
+    REJECT_STAGES = frozenset({"safety"})
+    # Stages memoized on disk under `cache_dir`: pure functions of (sql,
+    # schema_preview), so unlike LLM output they can't go stale with a model.
+    PERSISTENT_STAGES = frozenset({"safety"})
+    # Bump when prompts/stage logic change so persisted results are not reused.
+    CACHE_VERSION = "1"
 
     def __init__(
         self,
@@ -59,6 +245,16 @@ class Pipeline:
         repair: Optional[Repair] = None,
         context_engineer: ContextEngineer | None = None,
         metrics: Metrics | None = None,
+        parallel_stages: bool = False,
+        result_cache: Optional[MutableMapping[bytes, FinalResult]] = None,
+        stage_cache: Optional[MutableMapping[Tuple[str, bytes], StageResult]] = None,
+        semantic_cache: Optional[SemanticCache[FinalResult]] = None,
+        reject_cache: Optional[MutableMapping[Tuple[str, bytes], Any]] = None,
+        detector_cache: Optional[MutableMapping[bytes, List[str]]] = None,
+        cache_dir: Optional[str] = None,
+        plan_cache: Optional[SemanticCache[PlanEntry]] = None,
+        exact_plan_cache: Optional[MutableMapping[bytes, PlanEntry]] = None,
+        trace_sample_rate: float = 1.0,
     ):
         self.detector = detector
         self.planner = planner
@@ -69,20 +265,153 @@ class Pipeline:
         self.repair = repair or NoOpRepair()
         # If the verifier explicitly requires verification, enforce it in finalize.
         self.require_verification = bool(getattr(self.verifier, "required", False))
+        # Optional stage kwargs, resolved once instead of on every call.
+        self._verifier_accepts_adapter = self._accepts_kwarg(
+            self.verifier.run, "adapter"
+        )
+        self._planner_accepts_schema_pack = self._accepts_kwarg(
+            self.planner.run, "schema_pack"
+        )
+        self._generator_accepts_schema_pack = self._accepts_kwarg(
+            self.generator.run, "schema_pack"
+        )
+        # Verifiers that declare `needs_exec_result = False` may overlap the executor.
+        self._verifier_is_static = (
+            getattr(self.verifier, "needs_exec_result", True) is False
+        )
         self.context_engineer = context_engineer
+        # Stage exceptions carry a traceback in their errors only when debugging.
+        self._debug_tracebacks = os.getenv("NL2SQL_DEBUG_TB") == "1"
+        # Repair-input builders, bound once per pipeline.
+        self._planner_repair_input_builder = self._make_repair_input_builder(
+            "planner_failed", lambda r, kw: ""
+        )
+        self._generator_repair_input_builder = self._make_repair_input_builder(
+            "generator_failed", lambda r, kw: self._data(r).get("sql", "")
+        )
+        self._sql_repair_input_builder = self._make_repair_input_builder(
+            "stage_failed", lambda r, kw: kw.get("sql", "")
+        )
         self.metrics: Metrics = metrics or NoOpMetrics()
+        # Run the planner concurrently with the detector (speculative: the plan
+        # is discarded when the query turns out to be ambiguous).
+        self.parallel_stages = parallel_stages
+        # Fraction of runs that return traces; the rest return `traces=[]` and
+        # skip normalization. Metrics are recorded for every run regardless.
+        if not 0.0 <= trace_sample_rate <= 1.0:
+            raise ValueError("trace_sample_rate must be within [0, 1]")
+        self.trace_sample_rate = trace_sample_rate
+        # Guards injected cache access (see `run_many`).
+        self._lock = threading.Lock()
+        # Persistent memo of PERSISTENT_STAGES for CLI/serverless cold starts;
+        # the SQLite file is opened once per process and shared by all
+        # pipelines. Final results hold executor rows, which depend on the
+        # database's data, not just on the key's (query, schema), so they are
+        # never persisted.
+        self.persistent_stage_cache: Optional[
+            MutableMapping[Tuple[str, bytes], StageResult]
+        ] = None
+        if cache_dir:
+            self.persistent_stage_cache = shared_sqlite_cache(
+                os.path.join(cache_dir, "stages.sqlite3"),
+                namespace=self.CACHE_VERSION,
+                max_entries=_PERSISTENT_CACHE_ENTRIES,
+            )
+        # (provider, model) of LLM-backed stages, part of their cache keys so a
+        # model change never reuses another model's output.
+        self._llm_identity: Dict[str, Any] = {
+            "planner": self._stage_llm_identity(planner),
+            "generator": self._stage_llm_identity(generator),
+        }
+        # Optional response cache (any MutableMapping: dict, LRU, SQLite, ...).
+        # Only successful results are stored; disabled when None.
+        self.result_cache = result_cache
+        # Optional memo of ok planner/generator/safety results keyed by input hash.
+        self.stage_cache = stage_cache
+        # Optional paraphrase lookup, consulted after an exact-cache miss.
+        self.semantic_cache = semantic_cache
+        # Optional paraphrase lookup for planner+generator output only; safety,
+        # executor and verifier still run. Filled from verified runs.
+        self.plan_cache = plan_cache
+        # Exact-input variant (e.g. nl2sql.cache.LRUCache), checked first; safe for
+        # deterministic (temperature 0) prompts.
+        self.exact_plan_cache = exact_plan_cache
+        # Optional negative cache: detector questions and safety rejections.
+        # Use a TTL mapping (e.g. nl2sql.cache.TTLCache) so rules changes expire.
+        self.reject_cache = reject_cache
+        # Optional memo of detector output (clear and ambiguous) per
+        # (user_query, schema_preview), e.g. nl2sql.cache.LRUCache(4096).
+        self.detector_cache = detector_cache
 
     # ---------------------------- helpers ----------------------------
     @staticmethod
-    def _trace_list(*stages: Optional[StageResult]) -> List[dict]:
-        traces: List[dict] = []
-        for s in stages:
-            if not s:
-                continue
-            t = getattr(s, "trace", None)
-            if t is not None:
-                traces.append(getattr(t, "__dict__", t))
-        return traces
+    def _get_pool() -> ThreadPoolExecutor:
+        # Pipelines are built per request; share one pool across instances
+        # instead of spinning up worker threads for every pipeline.
+        global _STAGE_POOL
+        with _STAGE_POOL_LOCK:
+            if _STAGE_POOL is None:
+                _STAGE_POOL = ThreadPoolExecutor(
+                    max_workers=_POOL_WORKERS, thread_name_prefix="nl2sql"
+                )
+            return _STAGE_POOL
+
+    @staticmethod
+    def _data(r: StageResult) -> Mapping[str, Any]:
+        """Stage data as a mapping; never allocates for missing/non-dict data."""
+        data = r.data
+        return data if isinstance(data, dict) else _EMPTY_DATA
+
+    @staticmethod
+    def _stage_llm_identity(stage: Any) -> Optional[Tuple[str, str]]:
+        """(provider, model) of an LLM-backed stage; None if it has no `llm`."""
+        llm = getattr(stage, "llm", None)
+        if llm is None:
+            return None
+        cls = type(llm)
+        provider = getattr(llm, "PROVIDER_ID", None) or (
+            f"{cls.__module__}.{cls.__qualname__}"
+        )
+        model = getattr(stage, "model_id", None) or getattr(llm, "model", None)
+        return str(provider), str(model)
+
+    @staticmethod
+    def _stage_trace(r: StageResult) -> Optional[_Trace]:
+        """Trace record of a stage result, or None if the stage didn't report one."""
+        t = r.trace
+        if t is None:
+            return None
+        # Stage-provided values are coerced here, once, so `_normalize_traces`
+        # can assume well-typed records.
+        try:
+            duration_ms = float(t.duration_ms)
+        except (TypeError, ValueError):
+            duration_ms = 0.0
+        return _Trace(
+            stage=_STAGE_NAMES.get(t.stage) or str(t.stage),
+            duration_ms=duration_ms,
+            summary=t.summary or ("ok" if r.ok else "failed"),
+            notes=t.notes or _EMPTY_NOTES,
+            token_in=t.token_in,
+            token_out=t.token_out,
+            cost_usd=t.cost_usd,
+        )
+
+    @classmethod
+    def _push_trace(
+        cls,
+        traces: List[_Trace],
+        r: StageResult,
+        stage: str,
+        duration_ms: float,
+        notes: Optional[Dict[str, Any]] = None,
+    ) -> _Trace:
+        """Append the stage's own trace (or a fallback record) and return it."""
+        t = cls._stage_trace(r) or cls._mk_trace(
+            stage, duration_ms, "ok" if r.ok else "failed", notes
+        )
+        traces.append(t)
+        return t
 
     @staticmethod
     def _mk_trace(
@@ -90,39 +419,48 @@ class Pipeline:
         duration_ms: float,
         summary: str,
         notes: Optional[Dict[str, Any]] = None,
-    ) -> dict:
-        return {
-            "stage": stage,
-            "duration_ms": float(duration_ms),
-            "summary": summary,
-            "notes": notes or {},
-        }
+    ) -> _Trace:
+        # Callers pass float ms (perf_counter_ns deltas or 0.0); no coercion.
+        return _Trace(stage, duration_ms, summary, notes if notes else _EMPTY_NOTES)
 
     @staticmethod
-    def _normalize_traces(traces: List[dict]) -> List[dict]:
+    def _normalize_traces(traces: List[_Trace]) -> List[dict]:
+        # Records are well-typed at creation; only round and enforce minimum 1ms.
         norm: List[dict] = []
         for t in traces:
-            stage = str(t.get("stage", "unknown"))
-            dur = t.get("duration_ms", 0)
-            # robust to any type; enforce minimum 1ms
-            dur_val = 0.0
-            try:
-                dur_val = float(dur)
-            except Exception:
-                dur_val = 0.0
-            dur_int = max(1, int(round(dur_val)))
-            notes = t.get("notes") or {}
-            summary = t.get("summary") or ("ok" if t.get("ok") else "failed")
-            norm.append(
-                {
-                    "stage": stage,
-                    "duration_ms": dur_int,
-                    "summary": summary,
-                    "notes": notes or {},
-                }
-            )
+            payload = {
+                "stage": t.stage,
+                "duration_ms": max(1, int(round(t.duration_ms))),
+                "summary": t.summary or "failed",
+                # Output notes are always a real dict (JSON/pydantic friendly).
+                "notes": t.notes if type(t.notes) is dict else dict(t.notes),
+            }
+            # Optional LLM usage fields, only when the stage reported them.
+            if t.token_in is not None:
+                payload["token_in"] = t.token_in
+            if t.token_out is not None:
+                payload["token_out"] = t.token_out
+            if t.cost_usd is not None:
+                payload["cost_usd"] = t.cost_usd
+            norm.append(payload)
         return norm
 
+    @staticmethod
+    def _drop_traces(traces: List[_Trace]) -> List[dict]:
+        return []
+
+    @staticmethod
+    def _finalize(traces: List[dict], **fields: Any) -> FinalResult:
+        """Build a FinalResult; fields not given fall back to `_RESULT_DEFAULTS`."""
+        return FinalResult(traces=traces, **{**_RESULT_DEFAULTS, **fields})
+
+    def _trace_finisher(self) -> Callable[[List[_Trace]], List[dict]]:
+        """Per-run choice between full trace output and the unsampled no-op."""
+        rate = self.trace_sample_rate
+        if rate >= 1.0 or random.random() < rate:
+            return self._normalize_traces
+        return self._drop_traces
+
     @staticmethod
     def _accepts_kwargs(fn) -> bool:
         try:
@@ -133,12 +471,37 @@ class Pipeline:
             p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values()
         )
 
+    @staticmethod
+    def _declared_kwargs(fn) -> Optional[frozenset[str]]:
+        """
+        Kwargs a stage advertises via a class-level `ACCEPTED_KWARGS` frozenset
+        (or, for pipeline-internal callables, `_stage_kwargs`). Returns None for
+        stages that don't declare it (they get introspected).
+        """
+        declared = getattr(fn, "ACCEPTED_KWARGS", None)
+        if declared is None:
+            declared = getattr(getattr(fn, "__self__", None), "ACCEPTED_KWARGS", None)
+        return declared if isinstance(declared, frozenset) else None
+
+    @staticmethod
+    def _accepts_kwarg(fn, name: str) -> bool:
+        declared = Pipeline._declared_kwargs(fn)
+        if declared is not None:
+            return name in declared
+        try:
+            return name in inspect.signature(fn).parameters
+        except (TypeError, ValueError):
+            return False
+
     @staticmethod
     def _filter_kwargs(fn, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make stage calls backward-compatible with older stubs/fakes that don't accept
         extra kwargs like `traces`, `schema_preview`, etc.
         """
+        declared = Pipeline._declared_kwargs(fn)
+        if declared is not None:
+            return {k: v for k, v in kwargs.items() if k in declared}
         if Pipeline._accepts_kwargs(fn):
             return kwargs
         try:
@@ -148,17 +511,40 @@ class Pipeline:
         except (TypeError, ValueError):
             return kwargs
 
-    @staticmethod
-    def _safe_stage(fn, **kwargs) -> StageResult:
+    def _safe_stage(self, fn, **kwargs) -> StageResult:
         try:
-            call_kwargs = Pipeline._filter_kwargs(fn, kwargs)
+            call_kwargs = self._filter_kwargs(fn, kwargs)
             r = fn(**call_kwargs)
             if isinstance(r, StageResult):
                 return r
             return StageResult(ok=True, data=r, trace=None)
         except Exception as e:
-            tb = traceback.format_exc()
-            return StageResult(ok=False, data=None, trace=None, error=[f"{e}", tb])
+            return self._exception_result(e)
+
+    def _exception_result(self, e: Exception) -> StageResult:
+        """Failed StageResult for an exception raised by a stage."""
+        return StageResult(
+            ok=False,
+            data=None,
+            trace=None,
+            error=[f"{e}"],
+            # Marks the result as a crash, not a deliberate rejection.
+            notes={"exception": type(e).__name__},
+            # Formatted only if it reaches the response (`_error_details`).
+            traceback=LazyTraceback(e) if self._debug_tracebacks else None,
+        )
+
+    @staticmethod
+    def _is_rejection(r: StageResult) -> bool:
+        """A deliberate stage rejection, as opposed to an exception caught by `_safe_stage`."""
+        return not r.ok and not (r.notes and "exception" in r.notes)
+
+    @staticmethod
+    def _error_details(r: StageResult) -> Optional[List[str]]:
+        """Stage errors for `FinalResult.details`, plus the debug traceback if any."""
+        if r.traceback is None:
+            return r.error
+        return [*(r.error or ()), str(r.traceback)]
 
     @staticmethod
     def _is_repairable_sql_error(msg: str) -> bool:
@@ -194,23 +580,33 @@ class Pipeline:
             return (False, "not_sql_stage")
 
         if stage_name == "verifier":
-            data = r.data if isinstance(r.data, dict) else {}
-            if data.get("verified") is False or (r.ok is False):
+            if self._data(r).get("verified") is False or (r.ok is False):
                 return (True, "semantic_failure")
 
         errs = r.error or []
-        if any(isinstance(e, str) and self._is_repairable_sql_error(e) for e in errs):
+        if any(self._is_repairable_sql_error(e) for e in errs):
             return (True, "sql_error_repairable")
 
         return (False, "not_repairable")
 
+    @staticmethod
+    def _mark_repair_skipped(trace: _Trace, reason: str) -> None:
+        # Copy: notes may be shared with the stage's own (frozen) StageTrace.
+        trace.notes = {
+            **trace.notes,
+            "repair_eligible": False,
+            "repair_skip_reason": reason,
+        }
+
     def _run_with_repair(
         self,
         stage_name: str,
         fn,
         *,
         repair_input_builder,
+        stage_durations: List[Tuple[str, float]],
         max_attempts: int = 1,
+        first: Optional[StageAttempt] = None,
         **kwargs,
     ) -> StageResult:
         """
@@ -218,148 +614,282 @@ class Pipeline:
         SQL-only repair occurs for safety/executor/verifier.
 
         IMPORTANT: `traces` must be provided in kwargs as a list.
+        Stage durations are appended to `stage_durations` and flushed to metrics
+        once at the end of the run. `first` is an attempt already made
+        speculatively (see `_attempt_stage`); it is recorded here, not re-run.
         """
         traces = kwargs.get("traces")
         if traces is None or not isinstance(traces, list):
             raise TypeError("_run_with_repair requires `traces` (list) in kwargs")
 
+        # --- Fast path: first attempt succeeds → no repair bookkeeping ---
+        if first is None:
+            first = self._attempt_stage(stage_name, fn, kwargs)
+        r, stage_trace = self._record_stage(stage_name, first, traces, stage_durations)
+        if self._stage_done(stage_name, r):
+            return r
+
         attempt = 0
+        # Loop-invariant lookups, bound once for the repair loop.
+        perf_counter_ns = time.perf_counter_ns
+        metrics = self.metrics
+        safe_stage = self._safe_stage
+        repair_run = self.repair.run
+        is_sql_stage = stage_name in self.SQL_REPAIR_STAGES
+        # SQL already tried by this stage; repair returning one of these is a stall.
+        seen_sql = {kwargs.get("sql")}
 
         while True:
-            # --- 1) Run stage normally ---
-            t0 = time.perf_counter()
-            r = self._safe_stage(fn, **kwargs)
-            dt = (time.perf_counter() - t0) * 1000.0
-
-            self.metrics.observe_stage_duration_ms(stage=stage_name, dt_ms=dt)
-
-            self.metrics.inc_stage_call(stage=stage_name, ok=r.ok)
-            if not r.ok and getattr(r, "error_code", None) is not None:
-                self.metrics.inc_stage_error(
-                    stage=stage_name,
-                    error_code=str(r.error_code),
-                )
-
-            # attach stage trace
-            if getattr(r, "trace", None):
-                traces.append(r.trace.__dict__)
-            else:
-                traces.append(
-                    {
-                        "stage": stage_name,
-                        "duration_ms": dt,
-                        "summary": "ok" if r.ok else "failed",
-                        "notes": {},
-                    }
-                )
-
-            # --- 1.5) Verifier semantic failure is repairable even if ok=True ---
-            if r.ok and stage_name == "verifier":
-                data0 = r.data if isinstance(r.data, dict) else {}
-                if data0.get("verified") is True:
-                    return r
-                # ok=True but verified=False → treat as eligible for repair path
-                eligible, reason = self._should_repair(stage_name, r)
-                if not eligible:
-                    self.metrics.inc_repair_attempt(stage=stage_name, outcome="skipped")
-                    if traces and isinstance(traces[-1], dict):
-                        notes = traces[-1].get("notes") or {}
-                        if not isinstance(notes, dict):
-                            notes = {}
-                        notes["repair_eligible"] = False
-                        notes["repair_skip_reason"] = reason
-                        traces[-1]["notes"] = notes
-                    return r
-                # fallthrough into repair branch below
-
-            elif r.ok:
-                return r
-
-            # stage failed → check repair availability
+            # stage failed (or verifier ok=True but verified=False) → check repair
             eligible, reason = self._should_repair(stage_name, r)
             if not eligible:
-                self.metrics.inc_repair_attempt(stage=stage_name, outcome="skipped")
-                # annotate latest stage trace entry
-                if traces and isinstance(traces[-1], dict):
-                    notes = traces[-1].get("notes") or {}
-                    if not isinstance(notes, dict):
-                        notes = {}
-                    notes["repair_eligible"] = False
-                    notes["repair_skip_reason"] = reason
-                    traces[-1]["notes"] = notes
+                metrics.inc_repair_attempt(stage=stage_name, outcome="skipped")
+                self._mark_repair_skipped(stage_trace, reason)
                 return r
 
             attempt += 1
             if attempt > max_attempts:
                 return r
 
-            # --- 2) Build repair input ---
+            # --- 1) Build repair input ---
             repair_args = repair_input_builder(r, kwargs)
 
-            # --- 3) Run repair (always logged) ---
-            self.metrics.inc_repair_trigger(stage=stage_name, reason=reason)
-            self.metrics.inc_repair_attempt(stage=stage_name, outcome="attempt")
-            t1 = time.perf_counter()
-            r_fix = self._safe_stage(self.repair.run, **repair_args)
-            dt_fix = (time.perf_counter() - t1) * 1000.0
+            # --- 2) Run repair (always logged) ---
+            metrics.inc_repair_trigger(stage=stage_name, reason=reason)
+            metrics.inc_repair_attempt(stage=stage_name, outcome="attempt")
+            t1 = perf_counter_ns()
+            r_fix = safe_stage(repair_run, **repair_args)
+            dt_fix = (perf_counter_ns() - t1) / _NS_PER_MS
 
-            self.metrics.observe_stage_duration_ms(stage="repair", dt_ms=dt_fix)
+            stage_durations.append(("repair", dt_fix))
 
-            if getattr(r_fix, "trace", None):
-                traces.append(r_fix.trace.__dict__)
-            else:
-                traces.append(
-                    {
-                        "stage": "repair",
-                        "duration_ms": dt_fix,
-                        "summary": "ok" if r_fix.ok else "failed",
-                        "notes": {"stage": stage_name},
-                    }
-                )
+            self._push_trace(traces, r_fix, "repair", dt_fix, {"stage": stage_name})
 
             if not r_fix.ok:
-                self.metrics.inc_repair_attempt(stage=stage_name, outcome="failed")
+                metrics.inc_repair_attempt(stage=stage_name, outcome="failed")
                 return r  # repair itself failed → stop here
 
-            # --- 4) Only inject SQL if the stage is an SQL-producing stage ---
-            if stage_name in self.SQL_REPAIR_STAGES:
+            # --- 3) Only inject SQL if the stage is an SQL-producing stage ---
+            if is_sql_stage:
                 if "sql" in repair_args and "sql" in kwargs:
-                    kwargs["sql"] = (r_fix.data or {}).get("sql", kwargs["sql"])
+                    new_sql = self._data(r_fix).get("sql", kwargs["sql"])
+                    if not new_sql or new_sql in seen_sql:
+                        # No progress: re-running the stage would fail the same way.
+                        metrics.inc_repair_attempt(stage=stage_name, outcome="failed")
+                        traces.append(
+                            self._mk_trace(
+                                "repair",
+                                0.0,
+                                "no-progress",
+                                {
+                                    "stage": stage_name,
+                                    "reason": (
+                                        "identical_sql" if new_sql else "empty_sql"
+                                    ),
+                                },
+                            )
+                        )
+                        return r
+                    seen_sql.add(new_sql)
+                    kwargs["sql"] = new_sql
+
+            metrics.inc_repair_attempt(stage=stage_name, outcome="success")
+
+            # --- 4) Re-run stage with updated kwargs ---
+            r, stage_trace = self._record_stage(
+                stage_name,
+                self._attempt_stage(stage_name, fn, kwargs),
+                traces,
+                stage_durations,
+            )
+            if self._stage_done(stage_name, r):
+                return r
 
-            self.metrics.inc_repair_attempt(stage=stage_name, outcome="success")
+    def _cached_stage(
+        self, stage_name: str, fn, kwargs: Dict[str, Any]
+    ) -> Tuple[StageResult, Optional[str]]:
+        """
+        Run a stage through `stage_cache` (ok results; `persistent_stage_cache`
+        for PERSISTENT_STAGES when set) and `reject_cache` (rejections);
+        returns (result, "hit" | "reject_hit" | None).
+        Exceptions are never cached: they may be transient.
+        """
+        cache = self.stage_cache if stage_name in self.MEMO_STAGES else None
+        persistent = self.persistent_stage_cache
+        if persistent is not None and stage_name in self.PERSISTENT_STAGES:
+            cache = persistent
+        rejects = self.reject_cache if stage_name in self.REJECT_STAGES else None
+        if cache is None and rejects is None:
+            return self._safe_stage(fn, **kwargs), None
+
+        key = (
+            stage_name,
+            self._content_key(
+                [
+                    self._llm_identity.get(stage_name),
+                    {k: v for k, v in kwargs.items() if k != "traces"},
+                ]
+            ),
+        )
+        with self._lock:
+            hit = cache.get(key) if cache is not None else None
+            rejected = rejects.get(key) if rejects is not None else None
+        if hit is not None:
+            return hit, "hit"
+        if rejected is not None:
+            return rejected, "reject_hit"
+        r = self._safe_stage(fn, **kwargs)
+        with self._lock:
+            if r.ok and cache is not None:
+                cache[key] = r
+            elif rejects is not None and self._is_rejection(r):
+                rejects[key] = r
+        return r, None
+
+    def _plan_cache_lookup(
+        self, user_query: str, scope_parts: List[Any]
+    ) -> _PlanLookup:
+        """Look up planner+generator output: exact match first, then semantic."""
+        lookup = _PlanLookup()
+        exact = self.exact_plan_cache
+        if exact is not None:
+            lookup.exact_key = self._content_key(
+                [normalize_query(user_query), *scope_parts]
+            )
+            with self._lock:
+                lookup.entry = exact.get(lookup.exact_key)
+            if lookup.entry is not None:
+                lookup.notes = {"cache": "exact_hit"}
+                lookup.exact = True
+                return lookup
+
+        plan_cache = self.plan_cache
+        if plan_cache is None:
+            return lookup
+        lookup.scope = self._content_key(scope_parts)
+        try:
+            lookup.vec = plan_cache.embed(user_query)
+        except Exception:
+            return lookup  # best effort: an embedder failure is a miss
+        found = plan_cache.get(lookup.scope, lookup.vec) if lookup.vec else None
+        if found is not None:
+            lookup.entry, sim = found
+            lookup.notes = {"cache": "semantic_hit", "similarity": round(sim, 4)}
+        return lookup
+
+    def _plan_cache_store(self, lookup: _PlanLookup, entry: PlanEntry) -> None:
+        exact = self.exact_plan_cache
+        if exact is not None and lookup.exact_key is not None:
+            with self._lock:
+                exact[lookup.exact_key] = entry
+        if self.plan_cache is not None and lookup.vec is not None:
+            self.plan_cache.put(lookup.scope, lookup.vec, entry)
+
+    def _detect(self, user_query: str, schema_preview: str) -> StageResult:
+        """
+        Run the detector through `detector_cache` and `reject_cache`.
 
-            # re-run stage with updated kwargs
+        Returns `data={"questions": [...]}`; on a cache hit `notes["cache"]` is
+        "hit" or "reject_hit" as in `_cached_stage`. Exceptions propagate and
+        are never cached.
+        """
+        memo = self.detector_cache
+        rejects = self.reject_cache
+        if memo is None and rejects is None:
+            questions = self.detector.detect(user_query, schema_preview)
+            return StageResult(ok=True, data={"questions": questions})
+        digest = self._content_key([user_query, schema_preview])
+        key = ("detector", digest)
+        with self._lock:
+            cached = memo.get(digest) if memo is not None else None
+            note = "hit"
+            if cached is None and rejects is not None:
+                cached = rejects.get(key)
+                note = "reject_hit"
+        if cached is not None:
+            return StageResult(
+                ok=True, data={"questions": list(cached)}, notes={"cache": note}
+            )
+        questions = self.detector.detect(user_query, schema_preview)
+        with self._lock:
+            if memo is not None:
+                memo[digest] = list(questions or [])
+            if questions and rejects is not None:
+                rejects[key] = list(questions)
+        return StageResult(ok=True, data={"questions": questions})
+
+    def _attempt_stage(
+        self, stage_name: str, fn, kwargs: Dict[str, Any]
+    ) -> StageAttempt:
+        """
+        Run and time one stage attempt without recording anything, so it can
+        run speculatively and be discarded without touching metrics or traces.
+        """
+        t0 = time.perf_counter_ns()
+        r, cache_note = self._cached_stage(stage_name, fn, kwargs)
+        return r, cache_note, (time.perf_counter_ns() - t0) / _NS_PER_MS
 
-    @staticmethod
-    def _planner_repair_input_builder(stage_result, kwargs):
-        return {
-            "sql": "",
-            "error_msg": "; ".join(stage_result.error or ["planner_failed"]),
-            "schema_preview": kwargs.get("schema_preview", ""),
-        }
+    def _record_stage(
+        self,
+        stage_name: str,
+        attempt: StageAttempt,
+        traces: List[_Trace],
+        stage_durations: List[Tuple[str, float]],
+    ) -> Tuple[StageResult, _Trace]:
+        """Record a stage attempt: duration, metrics and its trace."""
+        r, cache_note, dt = attempt
+        stage_durations.append((stage_name, dt))
+
+        self.metrics.inc_stage_call(stage=stage_name, ok=r.ok)
+        if not r.ok and r.error_code is not None:
+            self.metrics.inc_stage_error(
+                stage=stage_name,
+                error_code=str(r.error_code),
+            )
 
-    @staticmethod
-    def _generator_repair_input_builder(stage_result, kwargs):
-        return {
-            "sql": (stage_result.data or {}).get("sql", ""),
-            "error_msg": "; ".join(stage_result.error or ["generator_failed"]),
-            "schema_preview": kwargs.get("schema_preview", ""),
-        }
+        # attach stage trace (kept by reference for later annotation)
+        if cache_note is not None:
+            self.metrics.inc_cache_hit(
+                cache="stage" if cache_note == "hit" else "reject"
+            )
+            summary = "cache_hit" if cache_note == "hit" else "cached-reject"
+            stage_trace = self._mk_trace(stage_name, dt, summary, {"cache": cache_note})
+            traces.append(stage_trace)
+        else:
+            stage_trace = self._push_trace(traces, r, stage_name, dt)
+        return r, stage_trace
+
+    @classmethod
+    def _stage_done(cls, stage_name: str, r: StageResult) -> bool:
+        """True if the stage needs no repair (verifier must also report verified)."""
+        if not r.ok:
+            return False
+        # Verifier semantic failure is repairable even if ok=True
+        return stage_name != "verifier" or cls._data(r).get("verified") is True
 
     @staticmethod
-    def _sql_repair_input_builder(stage_result, kwargs):
-        return {
-            "sql": kwargs.get("sql", ""),
-            "error_msg": "; ".join(stage_result.error or ["stage_failed"]),
-            "schema_preview": kwargs.get("schema_preview", ""),
-        }
+    def _make_repair_input_builder(
+        fallback_error: str,
+        sql_of: Callable[[StageResult, Dict[str, Any]], str],
+    ) -> RepairInputBuilder:
+        """Build a `repair_input_builder` for `_run_with_repair` (bound once in __init__)."""
+
+        def build(stage_result: StageResult, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "sql": sql_of(stage_result, kwargs),
+                "error_msg": "; ".join(stage_result.error or [fallback_error]),
+                "schema_preview": kwargs.get("schema_preview", ""),
+            }
+
+        return build
 
+    @_stage_kwargs("sql", "exec_result")
     def _call_verifier(
         self,
         *,
         sql: str,
         exec_result: Dict[str, Any],
-        traces: List[dict] | None = None,
+        traces: List[_Trace] | None = None,
     ) -> StageResult:
         """
         Call verifier with a backward-compatible signature.
@@ -367,18 +897,31 @@ class Pipeline:
         """
         kwargs: Dict[str, Any] = {"sql": sql, "exec_result": exec_result}
 
-        adapter = getattr(self.executor, "adapter", None)
-        if adapter is not None:
-            try:
-                params = inspect.signature(self.verifier.run).parameters
-                if "adapter" in params:
-                    kwargs["adapter"] = adapter
-            except (TypeError, ValueError):
-                # If signature introspection fails, fall back to the minimal call.
-                pass
+        if self._verifier_accepts_adapter:
+            adapter = getattr(self.executor, "adapter", None)
+            if adapter is not None:
+                kwargs["adapter"] = adapter
 
         return self.verifier.run(**kwargs)
 
+    @staticmethod
+    def _content_key(payload: Any) -> bytes:
+        """Stable 16-byte digest of a JSON-able payload (dict keys sorted)."""
+        return hashlib.blake2b(
+            _canonical_json(payload), digest_size=16, usedforsecurity=False
+        ).digest()
+
+    @classmethod
+    def _result_cache_key(
+        cls,
+        user_query: str,
+        schema_preview: str | None,
+        clarify_answers: Optional[Dict[str, Any]],
+    ) -> bytes:
+        return cls._content_key(
+            [normalize_query(user_query), schema_preview or "", clarify_answers or {}]
+        )
+
     def run(
         self,
         *,
@@ -386,10 +929,142 @@ class Pipeline:
         schema_preview: str | None = None,
         clarify_answers: Optional[Dict[str, Any]] = None,
     ) -> FinalResult:
-        t_all0 = time.perf_counter()
-        traces: List[dict] = []
-        details: List[str] = []
-        exec_result: Dict[str, Any] = {}
+        cache = self.result_cache
+        semantic = self.semantic_cache
+        if cache is None and semantic is None:
+            return self._run(
+                user_query=user_query,
+                schema_preview=schema_preview,
+                clarify_answers=clarify_answers,
+            )
+
+        t0 = time.perf_counter_ns()
+        hit: Optional[FinalResult] = None
+        hit_notes: Dict[str, Any] = {"cache": "hit"}
+
+        key = b""
+        if cache is not None:
+            key = self._result_cache_key(user_query, schema_preview, clarify_answers)
+            with self._lock:
+                hit = cache.get(key)
+
+        scope = b""
+        vec = None
+        if hit is None and semantic is not None:
+            scope = self._content_key([schema_preview or "", clarify_answers or {}])
+            try:
+                vec = semantic.embed(user_query)
+            except Exception:
+                vec = None  # best effort: an embedder failure is just a miss
+            found = semantic.get(scope, vec) if vec is not None else None
+            if found is not None:
+                hit, sim = found
+                hit_notes = {"cache": "semantic_hit", "similarity": round(sim, 4)}
+
+        if hit is not None:
+            dt = (time.perf_counter_ns() - t0) / _NS_PER_MS
+            self.metrics.inc_cache_hit(
+                cache="result" if hit_notes["cache"] == "hit" else "semantic"
+            )
+            self.metrics.inc_pipeline_run(status="ambiguous" if hit.ambiguous else "ok")
+            self.metrics.observe_stage_durations_ms([("pipeline_total", dt)])
+            # Stage traces of the original run are stale; report the hit only.
+            hit_trace = self._mk_trace("pipeline", dt, "cache_hit", hit_notes)
+            return self._detached(hit, self._normalize_traces([hit_trace]))
+
+        result = self._run(
+            user_query=user_query,
+            schema_preview=schema_preview,
+            clarify_answers=clarify_answers,
+        )
+        if result.ok and not result.error:
+            entry = self._detached(result, [])
+            if cache is not None:
+                with self._lock:
+                    cache[key] = entry
+            # Clarification prompts are tied to the exact wording; never reuse them.
+            if vec is not None and semantic is not None and not result.ambiguous:
+                semantic.put(scope, vec, entry)
+        return result
+
+    @staticmethod
+    def _detached(result: FinalResult, traces: List[dict]) -> FinalResult:
+        """
+        Deep copy of `result` with `traces`: cached entries never share rows or
+        lists with a caller, who may mutate its response.
+        """
+        return copy.deepcopy(replace(result, traces=traces))
+
+    async def run_async(
+        self,
+        *,
+        user_query: str,
+        schema_preview: str | None = None,
+        clarify_answers: Optional[Dict[str, Any]] = None,
+    ) -> FinalResult:
+        """
+        Awaitable `run()` for async callers; the pipeline runs on a worker thread
+        so the event loop stays free while stages wait on LLM/DB I/O.
+        """
+        return await asyncio.to_thread(
+            self.run,
+            user_query=user_query,
+            schema_preview=schema_preview,
+            clarify_answers=clarify_answers,
+        )
+
+    def run_many(
+        self, items: Iterable[Dict[str, Any]], *, max_workers: int = 8
+    ) -> List[FinalResult]:
+        """
+        Run independent queries concurrently; results keep the input order.
+
+        Each item holds `run()` kwargs (user_query, schema_preview, clarify_answers).
+        Stages are I/O-bound (LLM/DB), so threads overlap their latency. All
+        per-run state is local to `run()`; shared caches are accessed under a lock.
+        Identical items within a batch are run once; repeats get their own
+        copy of the result (see `_detached`).
+        """
+        items = list(items)
+        keys = [
+            self._result_cache_key(
+                item["user_query"],
+                item.get("schema_preview"),
+                item.get("clarify_answers"),
+            )
+            for item in items
+        ]
+        unique: Dict[bytes, Dict[str, Any]] = {}
+        for key, item in zip(keys, items):
+            unique.setdefault(key, item)
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nl2sql-batch"
+        ) as ex:
+            results = dict(
+                zip(unique, ex.map(lambda item: self.run(**item), unique.values()))
+            )
+        outs: List[FinalResult] = []
+        seen: set[bytes] = set()
+        for key in keys:
+            r = results[key]
+            outs.append(self._detached(r, r.traces) if key in seen else r)
+            seen.add(key)
+        return outs
+
+    def _run(
+        self,
+        *,
+        user_query: str,
+        schema_preview: str | None = None,
+        clarify_answers: Optional[Dict[str, Any]] = None,
+    ) -> FinalResult:
+        t_all0 = time.perf_counter_ns()
+        traces: List[_Trace] = []
+        finish_traces = self._trace_finisher()
+        stage_durations: List[Tuple[str, float]] = []
+        details: Optional[List[str]] = None
+        exec_result: Optional[Dict[str, Any]] = None
 
         schema_preview = schema_preview or ""
         clarify_answers = clarify_answers or {}
@@ -406,109 +1081,158 @@ class Pipeline:
                 constraints = [str(x) for x in packet.constraints]
 
         try:
-            # --- 1) detector ---
-            t0 = time.perf_counter()
-            questions = self.detector.detect(user_query, schema_preview)
-            dt = (time.perf_counter() - t0) * 1000.0
-            is_amb = bool(questions)
-            self.metrics.observe_stage_duration_ms(stage="detector", dt_ms=dt)
-            self.metrics.inc_stage_call(stage="detector", ok=True)
-            traces.append(
-                self._mk_trace(
-                    stage="detector",
-                    duration_ms=dt,
-                    summary=("ambiguous" if is_amb else "clear"),
-                    notes={"ambiguous": is_amb, "questions_len": len(questions or [])},
-                )
+            plan = self._plan_cache_lookup(
+                user_query,
+                [schema_for_llm, clarify_answers, constraints, self._llm_identity],
             )
-            if questions:
-                self.metrics.inc_pipeline_run(status="ambiguous")
-                self.metrics.inc_stage_call(stage="detector", ok=False)
-                return FinalResult(
-                    ok=True,
-                    ambiguous=True,
-                    error=False,
-                    details=[f"Ambiguities found: {len(questions)}"],
-                    questions=questions,
-                    sql=None,
-                    rationale=None,
-                    verified=None,
-                    traces=self._normalize_traces(traces),
-                )
+            plan_hit = plan.entry
+            if plan_hit is not None:
+                self.metrics.inc_cache_hit(cache="plan")
 
-            # --- 2) planner ---
             planner_kwargs: Dict[str, Any] = {
                 "user_query": user_query,
                 "schema_preview": schema_for_llm,
                 "traces": traces,
             }
-            try:
-                if "schema_pack" in inspect.signature(self.planner.run).parameters:
-                    planner_kwargs["schema_pack"] = schema_for_llm
-            except (TypeError, ValueError):
-                pass
-
-            r_plan = self._run_with_repair(
-                "planner",
-                self.planner.run,
-                repair_input_builder=self._planner_repair_input_builder,
-                max_attempts=1,
-                **planner_kwargs,
-            )
+            if self._planner_accepts_schema_pack:
+                planner_kwargs["schema_pack"] = schema_for_llm
+
+            # Planner doesn't depend on the detector; optionally start its first
+            # attempt early so both overlap. Only that attempt runs in the pool:
+            # it is recorded (and repaired if needed) once the detector clears
+            # the query, and a discarded one leaves no metrics behind.
+            planner_future: Optional[Future[StageAttempt]] = None
+            if self.parallel_stages and plan_hit is None:
+                planner_future = self._get_pool().submit(
+                    self._attempt_stage,
+                    "planner",
+                    self.planner.run,
+                    {**planner_kwargs, "traces": []},
+                )
+
+            # --- 1) detector ---
+            if plan.exact:
+                # An exact plan hit was stored after a clear, verifier-accepted run
+                # of the same query in the same scope; the detector would agree.
+                # Semantic hits still run it: a paraphrase may itself be ambiguous.
+                traces.append(
+                    self._mk_trace("detector", 0.0, "skipped_cache_hit", plan.notes)
+                )
+            else:
+                t0 = time.perf_counter_ns()
+                try:
+                    r_det = self._detect(user_query, schema_preview)
+                except Exception:
+                    # Propagates, as before: the API answers with its generic
+                    # `pipeline_run_error` envelope, without the exception text.
+                    if planner_future is not None:
+                        planner_future.cancel()
+                    self.metrics.inc_stage_call(stage="detector", ok=False)
+                    raise
+                dt = (time.perf_counter_ns() - t0) / _NS_PER_MS
+                stage_durations.append(("detector", dt))
+                self.metrics.inc_stage_call(stage="detector", ok=True)
+                questions = self._data(r_det).get("questions") or []
+                detector_cache = (r_det.notes or _EMPTY_NOTES).get("cache")
+                if questions and clarify_answers:
+                    # Answered questions no longer make the query ambiguous; the
+                    # (cached) detector output itself stays answer-independent.
+                    questions = [q for q in questions if q not in clarify_answers]
+                is_amb = bool(questions)
+                detector_notes: Dict[str, Any] = {
+                    "ambiguous": is_amb,
+                    "questions_len": len(questions or []),
+                }
+                if detector_cache is not None:
+                    detector_notes["cache"] = detector_cache
+                    self.metrics.inc_cache_hit(
+                        cache="detector" if detector_cache == "hit" else "reject"
+                    )
+                traces.append(
+                    self._mk_trace(
+                        stage="detector",
+                        duration_ms=dt,
+                        summary=(
+                            "cached-reject"
+                            if detector_cache == "reject_hit"
+                            else ("ambiguous" if is_amb else "clear")
+                        ),
+                        notes=detector_notes,
+                    )
+                )
+                if questions:
+                    if planner_future is not None:
+                        # Discarded; a started attempt finishes unrecorded.
+                        planner_future.cancel()
+                    self.metrics.inc_pipeline_run(status="ambiguous")
+                    self.metrics.inc_stage_call(stage="detector", ok=False)
+                    return self._finalize(
+                        finish_traces(traces),
+                        ok=True,
+                        ambiguous=True,
+                        details=[f"Ambiguities found: {len(questions)}"],
+                        questions=questions,
+                    )
+
+            # --- 2) planner ---
+            if plan_hit is not None:
+                r_plan = StageResult(ok=True, data=dict(plan_hit[0]))
+                traces.append(self._mk_trace("planner", 0.0, "cache_hit", plan.notes))
+            else:
+                r_plan = self._run_with_repair(
+                    "planner",
+                    self.planner.run,
+                    repair_input_builder=self._planner_repair_input_builder,
+                    max_attempts=1,
+                    stage_durations=stage_durations,
+                    first=planner_future.result() if planner_future else None,
+                    **planner_kwargs,
+                )
             if not r_plan.ok:
                 self.metrics.inc_pipeline_run(status="error")
-                return FinalResult(
-                    ok=False,
-                    ambiguous=False,
+                return self._finalize(
+                    finish_traces(traces),
                     error=True,
-                    details=r_plan.error,
+                    details=self._error_details(r_plan),
                     error_code=ErrorCode.PIPELINE_CRASH,
-                    questions=None,
-                    sql=None,
-                    rationale=None,
-                    verified=None,
-                    traces=self._normalize_traces(traces),
                 )
 
             # --- 3) generator ---
-            gen_kwargs: Dict[str, Any] = {
-                "user_query": user_query,
-                "schema_preview": schema_for_llm,
-                "plan_text": (r_plan.data or {}).get("plan"),
-                "clarify_answers": clarify_answers,
-                "traces": traces,
-                "constraints": constraints,
-            }
-            try:
-                if "schema_pack" in inspect.signature(self.generator.run).parameters:
+            if plan_hit is not None:
+                r_gen = StageResult(ok=True, data=dict(plan_hit[1]))
+                traces.append(self._mk_trace("generator", 0.0, "cache_hit", plan.notes))
+            else:
+                gen_kwargs: Dict[str, Any] = {
+                    "user_query": user_query,
+                    "schema_preview": schema_for_llm,
+                    "plan_text": self._data(r_plan).get("plan"),
+                    "clarify_answers": clarify_answers,
+                    "traces": traces,
+                    "constraints": constraints,
+                }
+                if self._generator_accepts_schema_pack:
                     gen_kwargs["schema_pack"] = schema_for_llm
-            except (TypeError, ValueError):
-                pass
 
-            r_gen = self._run_with_repair(
-                "generator",
-                self.generator.run,
-                repair_input_builder=self._generator_repair_input_builder,
-                max_attempts=1,
-                **gen_kwargs,
-            )
+                r_gen = self._run_with_repair(
+                    "generator",
+                    self.generator.run,
+                    repair_input_builder=self._generator_repair_input_builder,
+                    max_attempts=1,
+                    stage_durations=stage_durations,
+                    **gen_kwargs,
+                )
             if not r_gen.ok:
                 self.metrics.inc_pipeline_run(status="error")
-                return FinalResult(
-                    ok=False,
-                    ambiguous=False,
+                return self._finalize(
+                    finish_traces(traces),
                     error=True,
-                    details=r_gen.error,
+                    details=self._error_details(r_gen),
                     error_code=ErrorCode.LLM_BAD_OUTPUT,
-                    questions=None,
-                    sql=None,
-                    rationale=None,
-                    verified=None,
-                    traces=self._normalize_traces(traces),
                 )
 
-            sql = (r_gen.data or {}).get("sql")
-            rationale = (r_gen.data or {}).get("rationale")
+            gen_data = self._data(r_gen)
+            sql = gen_data.get("sql")
+            rationale = gen_data.get("rationale")
 
             # Guard: empty SQL
             if not sql or not str(sql).strip():
@@ -516,17 +1240,12 @@ class Pipeline:
                 traces.append(
                     self._mk_trace("generator", 0.0, "failed", {"reason": "empty_sql"})
                 )
-                return FinalResult(
-                    ok=False,
-                    ambiguous=False,
+                return self._finalize(
+                    finish_traces(traces),
                     error=True,
                     details=["empty_sql"],
                     error_code=ErrorCode.LLM_BAD_OUTPUT,
-                    questions=None,
-                    sql=None,
                     rationale=rationale,
-                    verified=None,
-                    traces=self._normalize_traces(traces),
                 )
 
             # --- 4) safety ---
@@ -535,58 +1254,78 @@ class Pipeline:
                 self.safety.run,
                 repair_input_builder=self._sql_repair_input_builder,
                 max_attempts=1,
+                stage_durations=stage_durations,
                 sql=sql,
                 schema_preview=schema_for_llm,
                 traces=traces,
             )
             if not r_safe.ok:
                 self.metrics.inc_pipeline_run(status="error")
-                return FinalResult(
-                    ok=False,
-                    ambiguous=False,
+                return self._finalize(
+                    finish_traces(traces),
                     error=True,
-                    details=r_safe.error,
+                    details=self._error_details(r_safe),
                     error_code=r_safe.error_code,
-                    questions=None,
                     sql=sql,
                     rationale=rationale,
-                    verified=None,
-                    traces=self._normalize_traces(traces),
                 )
 
             # Use sanitized SQL from safety
-            sql = (r_safe.data or {}).get("sql", sql)
+            sql = self._data(r_safe).get("sql", sql)
 
             # --- 5) executor ---
+            # A verifier that only inspects the SQL (not `exec_result`) can run its
+            # first attempt alongside the executor. As with the planner, it is only
+            # recorded (and repaired) if execution succeeds.
+            verifier_kwargs: Dict[str, Any] = {
+                "sql": sql,
+                "exec_result": {},
+                "schema_preview": schema_for_llm,
+                "traces": traces,
+            }
+            verifier_future: Optional[Future[StageAttempt]] = None
+            if self.parallel_stages and self._verifier_is_static:
+                verifier_future = self._get_pool().submit(
+                    self._attempt_stage,
+                    "verifier",
+                    self._call_verifier,
+                    {**verifier_kwargs, "traces": []},
+                )
+
             r_exec = self._run_with_repair(
                 "executor",
                 self.executor.run,
                 repair_input_builder=self._sql_repair_input_builder,
                 max_attempts=1,
+                stage_durations=stage_durations,
                 sql=sql,
                 schema_preview=schema_for_llm,
                 traces=traces,
             )
             if not r_exec.ok and r_exec.error:
-                details.extend(r_exec.error)
+                details = self._error_details(r_exec)
             if r_exec.ok and isinstance(r_exec.data, dict):
-                exec_result = dict(r_exec.data)
+                exec_result = r_exec.data
 
             # --- 6) verifier (only if execution succeeded) ---
             verified = False
             if r_exec.ok:
+                if verifier_future is None:
+                    verifier_kwargs["exec_result"] = exec_result or {}
                 r_ver = self._run_with_repair(
                     "verifier",
                     self._call_verifier,
                     repair_input_builder=self._sql_repair_input_builder,
                     max_attempts=1,
-                    sql=sql,
-                    exec_result=(r_exec.data or {}),
-                    schema_preview=schema_for_llm,
-                    traces=traces,
+                    stage_durations=stage_durations,
+                    first=verifier_future.result() if verifier_future else None,
+                    **verifier_kwargs,
                 )
-                data_v = r_ver.data if isinstance(r_ver.data, dict) else {}
-                verified = bool(data_v.get("verified") is True)
+                verified = self._data(r_ver).get("verified") is True
+            elif verifier_future is not None:
+                # Discarded: cancelled if not yet started, otherwise left to
+                # finish unrecorded (no metrics, traces or repair).
+                verifier_future.cancel()
 
             # --- 9) finalize ---
             has_errors = bool(details)
@@ -608,6 +1347,11 @@ class Pipeline:
 
             self.metrics.inc_pipeline_run(status=("ok" if ok else "error"))
 
+            # Only plans the verifier itself accepted; `verified_final` is forced
+            # to True when verification isn't required.
+            if plan_hit is None and ok and verified:
+                self._plan_cache_store(plan, (dict(self._data(r_plan)), dict(gen_data)))
+
             traces.append(
                 self._mk_trace(
                     stage="pipeline",
@@ -615,22 +1359,20 @@ class Pipeline:
                     summary="finalize",
                     notes={
                         "final_verified": bool(verified_final),
-                        "details_len": len(details),
+                        "details_len": len(details or ()),
                         "need_verification": need_ver,
                     },
                 )
             )
 
-            return FinalResult(
+            return self._finalize(
+                finish_traces(traces),
                 ok=ok,
-                ambiguous=False,
                 error=err,
                 details=details or None,
                 sql=sql,
                 rationale=rationale,
                 verified=verified_final,
-                questions=None,
-                traces=self._normalize_traces(traces),
                 result=exec_result or None,
             )
 
@@ -640,6 +1382,7 @@ class Pipeline:
 
         finally:
             # Always record total latency, even on early return/exception
-            self.metrics.observe_stage_duration_ms(
-                stage="pipeline_total", dt_ms=(time.perf_counter() - t_all0) * 1000.0
+            stage_durations.append(
+                ("pipeline_total", (time.perf_counter_ns() - t_all0) / _NS_PER_MS)
             )
+            self.metrics.observe_stage_durations_ms(stage_durations)
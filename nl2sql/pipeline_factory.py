@@ -77,6 +77,11 @@ def _make_metrics() -> Metrics:
     return PrometheusMetrics()
 
 
+def _cache_dir(cfg: Dict[str, Any]) -> Optional[str]:
+    """Persistent cache directory (env NL2SQL_CACHE_DIR overrides config `cache_dir`)."""
+    return os.getenv("NL2SQL_CACHE_DIR") or cfg.get("cache_dir") or None
+
+
 def _default_context_engineer() -> ContextEngineer:
     return ContextEngineer(
         budget=ContextBudget(
@@ -227,6 +232,9 @@ def pipeline_from_config(path: str) -> Pipeline:
         repair=repair,
         context_engineer=_default_context_engineer(),
         metrics=_make_metrics(),
+        parallel_stages=bool(cfg.get("parallel_stages", False)),
+        trace_sample_rate=float(cfg.get("trace_sample_rate", 1.0)),
+        cache_dir=_cache_dir(cfg),
     )
 
 
@@ -342,4 +350,7 @@ def pipeline_from_config_with_adapter(path: str, *, adapter: DBAdapter) -> Pipel
         repair=repair,
         context_engineer=_default_context_engineer(),
         metrics=_make_metrics(),
+        parallel_stages=bool(cfg.get("parallel_stages", False)),
+        trace_sample_rate=float(cfg.get("trace_sample_rate", 1.0)),
+        cache_dir=_cache_dir(cfg),
     )
@@ -1,26 +1,29 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Any, ClassVar, Dict, List, Tuple, Optional
 
 __all__ = ["Planner"]
 
 
+_CREATE_TABLE_RE = re.compile(
+    r"(?im)^\s*create\s+table\s+`?([A-Za-z_][A-Za-z0-9_]*)`?\b"
+)
+
+
+@lru_cache(maxsize=64)
+def _schema_table_names(schema_text: str) -> Tuple[str, ...]:
+    # Schema previews repeat across requests (one per DB); parse each once.
+    # dict.fromkeys de-dups while preserving order.
+    return tuple(dict.fromkeys(_CREATE_TABLE_RE.findall(schema_text)))
+
+
 def _extract_table_names_from_schema(schema_text: str) -> List[str]:
     """Best-effort table name extraction from schema preview."""
     if not schema_text:
         return []
-    names = re.findall(
-        r"(?im)^\s*create\s+table\s+`?([A-Za-z_][A-Za-z0-9_]*)`?\b", schema_text
-    )
-    # de-dup preserving order
-    seen: set[str] = set()
-    out: List[str] = []
-    for n in names:
-        if n not in seen:
-            out.append(n)
-            seen.add(n)
-    return out
+    return list(_schema_table_names(schema_text))
 
 
 # --------- Heuristic schema trimming (safe, mypy-clean) ---------
@@ -92,6 +95,11 @@ def _pick_relevant_tables(schema_text: str, question: str, k: int = 3) -> str:
 class Planner:
     """Planner wrapper around the LLM provider."""
 
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset(
+        {"user_query", "schema_preview", "constraints", "traces"}
+    )
+
     def __init__(self, *, llm, model_id: str | None = None) -> None:
         self.llm = llm
         # ensure model_id is always a str (for mypy)
@@ -1,4 +1,5 @@
 import time
+from typing import ClassVar
 
 from nl2sql.types import StageTrace, StageResult
 from adapters.llm.base import LLMProvider
@@ -16,12 +17,16 @@ Return only the corrected SQL.
 
 class Repair:
     name = "repair"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset(
+        {"sql", "error_msg", "schema_preview"}
+    )
 
     def __init__(self, llm: LLMProvider):
         self.llm = llm
 
     def run(self, *, sql: str, error_msg: str, schema_preview: str) -> StageResult:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
         fixed_sql, t_in, t_out, cost = self.llm.repair(
             sql=sql,
             error_msg=f"{GUIDELINES}\n\n{error_msg}",
@@ -29,7 +34,7 @@ class Repair:
         )
         trace = StageTrace(
             stage=self.name,
-            duration_ms=(time.perf_counter() - t0) * 1000,
+            duration_ms=(time.perf_counter_ns() - t0) / 1_000_000,
             token_in=t_in,
             token_out=t_out,
             cost_usd=cost,
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 import time
-from typing import List, Pattern, Any, cast
+from typing import Any, ClassVar, List, Pattern, cast
 
 import sqlglot
 from sqlglot import exp
@@ -80,8 +80,8 @@ _FORBIDDEN_LOOSE: List[Pattern[str]] = [
 _MAX_SQL_LEN = 200_000  # defensive bound against catastrophic inputs
 
 
-def _ms(t0: float) -> int:
-    return int((time.perf_counter() - t0) * 1000)
+def _ms(t0_ns: int) -> int:
+    return (time.perf_counter_ns() - t0_ns) // 1_000_000
 
 
 def _strip_fences(sql: str) -> str:
@@ -208,6 +208,8 @@ class Safety:
     """
 
     name = "safety"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset({"sql"})
 
     def __init__(
         self, allow_explain: bool = True, forbid_comments: bool = False
@@ -216,7 +218,7 @@ class Safety:
         self.forbid_comments = forbid_comments
 
     def check(self, sql: str) -> StageResult:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
 
         # 0) nil / size guard
         if not sql or not sql.strip():
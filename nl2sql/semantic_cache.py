@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Deque,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+Embedder = Callable[[str], Sequence[float]]
+Vector = Tuple[float, ...]
+
+T = TypeVar("T")
+
+# Quoted strings and numbers: tokens a similarity score can't tell apart
+# ("customer 42" vs "customer 43") but that change the answer. A single
+# quote inside a word ("haven't") is an apostrophe, not a quote.
+_LITERAL_RE = re.compile(r"(?<!\w)'[^']*'(?!\w)|\"[^\"]*\"|\d+(?:\.\d+)?")
+
+# Ordering, extremum, comparison and negation words: one of them flips the
+# answer ("sorted ascending" vs "descending") while barely moving a vector.
+_GUARD_WORDS = frozenset(
+    """
+    asc ascending desc descending increasing decreasing reverse
+    min minimum max maximum least most fewest lowest highest smallest largest
+    biggest cheapest top bottom first last earliest latest oldest newest
+    more less fewer greater above below over under before after
+    not no never none nor neither without except excluding
+    """.split()
+)
+_WORD_RE = re.compile(r"[a-z]+(?:'t)?")
+
+
+def query_literals(text: str) -> Tuple[str, ...]:
+    """
+    Tokens a semantic hit must match exactly: quoted and numeric literals in
+    order of appearance, then the sorted ordering/extremum/negation words of
+    `text` (lowercased; "n't" counts as "not").
+    """
+    words = [
+        "not" if w.endswith("n't") else w
+        for w in _WORD_RE.findall(
+            _LITERAL_RE.sub(" ", text).lower().replace("\u2019", "'")
+        )
+    ]
+    guards = sorted(w for w in words if w in _GUARD_WORDS)
+    return (*_LITERAL_RE.findall(text), *guards)
+
+
+def hashed_ngram_embedding(text: str, *, n: int = 3, dim: int = 256) -> List[float]:
+    """
+    Cheap, dependency-free embedding: hashed character n-gram counts.
+
+    Stable across processes (crc32, not `hash()`); catches whitespace and
+    punctuation variants, not paraphrases, and can't tell opposite meanings
+    apart beyond the `query_literals` guard. For tests and demos; inject a
+    real sentence embedder in production. Case is kept (as in
+    `nl2sql.cache.normalize_query`), since it can belong to a value.
+    """
+    vec = [0.0] * dim
+    t = f" {' '.join(text.split())} "
+    for i in range(len(t) - n + 1):
+        vec[zlib.crc32(t[i : i + n].encode("utf-8")) % dim] += 1.0
+    return vec
+
+
+@dataclass(frozen=True, slots=True)
+class Probe:
+    """An embedded query: unit vector plus the tokens a hit must match exactly."""
+
+    vec: Vector
+    literals: Tuple[str, ...]
+
+
+class SemanticCache(Generic[T]):
+    """
+    Similarity cache for near-duplicate user queries (opt-in).
+
+    Queries are embedded with an injected `embedder` and matched by cosine
+    similarity against previously stored queries. A hit also requires the
+    same `query_literals` (quoted/numeric literals plus ordering, extremum and
+    negation words), so "orders of customer 42" never serves customer 43 and
+    "sorted ascending" never serves "descending". There is no default
+    embedder: near-duplicate detection is only as good as the injected one
+    (`hashed_ngram_embedding` is for tests and demos). Entries are partitioned by `scope` (e.g. a digest of
+    schema + clarify answers), so a paraphrase only reuses a result computed
+    against the same context.
+
+    Lookup is a linear scan over unit vectors, which is fine for the bounded
+    sizes used here (`max_entries` per scope, `max_scopes` scopes; oldest
+    evicted first).
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        *,
+        threshold: float = 0.95,
+        max_entries: int = 256,
+        max_scopes: int = 1024,
+    ) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._entries: OrderedDict[Hashable, Deque[Tuple[Probe, T]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> Optional[Probe]:
+        """Probe for `text` (unit-normalized embedding), or None for a zero vector."""
+        vec = [float(x) for x in self.embedder(text)]
+        norm = math.sqrt(sum(x * x for x in vec))
+        if norm == 0.0:
+            return None
+        return Probe(tuple(x / norm for x in vec), query_literals(text))
+
+    def get(self, scope: Hashable, probe: Probe) -> Optional[Tuple[T, float]]:
+        """Best stored value (and its similarity) at or above the threshold."""
+        with self._lock:
+            entries = list(self._entries.get(scope, ()))
+        best: Optional[T] = None
+        best_sim = self.threshold
+        vec = probe.vec
+        for other, value in entries:
+            if other.literals != probe.literals:
+                continue
+            sim = sum(a * b for a, b in zip(vec, other.vec))
+            if sim >= best_sim:
+                best, best_sim = value, sim
+        if best is None:
+            return None
+        return best, best_sim
+
+    def put(self, scope: Hashable, probe: Probe, value: T) -> None:
+        with self._lock:
+            entries = self._entries.get(scope)
+            if entries is None:
+                entries = self._entries[scope] = deque(maxlen=self.max_entries)
+                while len(self._entries) > self.max_scopes:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(scope)
+            entries.append((probe, value))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,8 +1,12 @@
+from typing import ClassVar
+
 from nl2sql.types import StageResult, StageTrace
 
 
 class NoOpExecutor:
     name = "executor"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset({"sql"})
 
     def run(self, sql: str) -> StageResult:
         # pretend success, return empty result set
@@ -15,6 +19,8 @@ class NoOpExecutor:
 
 class NoOpVerifier:
     name = "verifier"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset({"sql", "exec_result"})
 
     def run(self, sql: str, exec_result: StageResult) -> StageResult:
         # always verified for legacy tests
@@ -27,6 +33,10 @@ class NoOpVerifier:
 
 class NoOpRepair:
     name = "repair"
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset(
+        {"sql", "error_msg", "schema_preview"}
+    )
 
     def run(self, sql: str, error_msg: str, schema_preview: str) -> StageResult:
         # return original SQL unchanged
@@ -9,7 +9,7 @@ from nl2sql.errors.codes import ErrorCode
 # =====================
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StageTrace:
     stage: str
     duration_ms: float
@@ -34,7 +34,7 @@ class StageTrace:
 # =====================
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StageResult:
     ok: bool
 
@@ -43,6 +43,8 @@ class StageResult:
 
     # Human-readable error messages (debug / UI only)
     error: Optional[List[str]] = None
+    # Debug-only traceback of a stage exception; formatted on str()
+    traceback: Optional[Any] = None
 
     # === Contract-level semantics ===
     error_code: Optional[ErrorCode] = None
@@ -50,35 +52,3 @@ class StageResult:
 
     # Free-form notes (internal use)
     notes: Optional[Dict[str, Any]] = None
-
-
-# =====================
-# Final pipeline result
-# =====================
-
-
-@dataclass(frozen=True)
-class FinalResult:
-    """
-    Final domain result of the whole pipeline.
-    Adapters (HTTP/CLI/UI) should serialize this to dict/JSON at the boundary.
-    """
-
-    ok: bool
-    ambiguous: bool
-    error: bool
-
-    # Output
-    sql: Optional[str]
-    rationale: Optional[str]
-    verified: Optional[bool]
-
-    # Error surface
-    error_code: Optional[ErrorCode]
-    details: Optional[List[str]]
-
-    # UX helpers
-    questions: Optional[List[str]]
-
-    # Observability
-    traces: List[Dict[str, Any]]
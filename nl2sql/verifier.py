@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 import time
-from typing import Any, Dict
+from typing import Any, ClassVar, Dict
 
 from nl2sql.errors.codes import ErrorCode
 from adapters.metrics.prometheus import verifier_checks_total, verifier_failures_total
@@ -20,9 +20,15 @@ class Verifier:
     """
 
     required = False
+    # Checks only the SQL (and its plan), never rows; may run alongside the executor.
+    needs_exec_result = False
+    # Keyword arguments accepted by `run`; lets the pipeline skip signature probing.
+    ACCEPTED_KWARGS: ClassVar[frozenset[str]] = frozenset(
+        {"sql", "exec_result", "adapter"}
+    )
 
     def verify(self, sql: str, *, adapter: DBAdapter | None = None) -> StageResult:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
         notes: Dict[str, Any] = {}
         reason = "ok"
 
@@ -110,7 +116,7 @@ class Verifier:
                     )
 
             # --- pass ---
-            dt = int(round((time.perf_counter() - t0) * 1000.0))
+            dt = round((time.perf_counter_ns() - t0) / 1_000_000)
             notes.update({"verified": True, "reason": reason})
 
             verifier_checks_total.labels(ok="true").inc()
@@ -166,7 +172,7 @@ class Verifier:
 
     def _fail(
         self,
-        t0: float,
+        t0: int,
         notes: Dict[str, Any],
         *,
         error: list[str],
@@ -174,7 +180,7 @@ class Verifier:
         exc_type: str | None = None,
         error_code: ErrorCode | None = None,
     ) -> StageResult:
-        dt = int(round((time.perf_counter() - t0) * 1000.0))
+        dt = round((time.perf_counter_ns() - t0) / 1_000_000)
 
         notes.update({"verified": False, "reason": reason})
         if exc_type:
@@ -2,8 +2,11 @@ import os
 import pytest
 from dotenv import load_dotenv
 
+from adapters.metrics.noop import NoOpMetrics
 from app.main import app
 from app.routers import nl2sql
+from nl2sql.pipeline import Pipeline
+from nl2sql.types import StageResult
 
 # Load .env once for tests
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -40,3 +43,85 @@ def disable_api_key_auth():
             app.dependency_overrides.pop(nl2sql.require_api_key, None)
         else:
             app.dependency_overrides[nl2sql.require_api_key] = prev
+
+
+# ---------------------------------------------------------------------------
+# Shared pipeline fakes
+# ---------------------------------------------------------------------------
+class DetectorOK:
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, *a, **k):
+        self.calls += 1
+        return []
+
+
+class PlannerOK:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, *a, **k):
+        self.calls += 1
+        return StageResult(ok=True, data={"plan": "p"})
+
+
+class GeneratorOK:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, *a, **k):
+        self.calls += 1
+        return StageResult(ok=True, data={"sql": "SELECT * FROM t", "rationale": "ok"})
+
+
+class SafetyOK:
+    def run(self, *a, **k):
+        return StageResult(ok=True, data={"sql": k.get("sql", "SELECT * FROM t")})
+
+
+class ExecOK:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, *a, **k):
+        self.calls += 1
+        return StageResult(ok=True, data={"rows": [{"x": 1}]})
+
+
+class RecordingMetrics(NoOpMetrics):
+    def __init__(self):
+        self.batches = []
+        self.hits = []
+        self.stage_calls = []
+
+    def observe_stage_durations_ms(self, observations):
+        self.batches.append(list(observations))
+
+    def inc_cache_hit(self, *, cache):
+        self.hits.append(cache)
+
+    def inc_stage_call(self, *, stage, ok):
+        self.stage_calls.append((stage, ok))
+
+
+@pytest.fixture
+def recording_metrics():
+    return RecordingMetrics()
+
+
+@pytest.fixture
+def make_pipeline():
+    """Pipeline factory with counting, always-ok fakes; keyword args override them."""
+
+    def make(**kwargs):
+        stages = {
+            "detector": DetectorOK(),
+            "planner": PlannerOK(),
+            "generator": GeneratorOK(),
+            "safety": SafetyOK(),
+            "executor": ExecOK(),
+        }
+        return Pipeline(**{**stages, **kwargs})
+
+    return make
@@ -58,3 +58,37 @@ def test_db_locked_is_503_and_retryable():
         assert isinstance(body["error"].get("details"), list)
     finally:
         app.dependency_overrides.pop(get_nl2sql_service, None)
+
+
+def test_detector_crash_keeps_pipeline_run_error_envelope(monkeypatch, make_pipeline):
+    from app.services import nl2sql_service
+    from app.settings import Settings
+
+    class DetectorBoom:
+        def detect(self, *a, **k):
+            raise RuntimeError("secret connection string in message")
+
+    monkeypatch.setattr(
+        nl2sql_service.NL2SQLService, "_select_adapter", lambda self, db_id: None
+    )
+    monkeypatch.setattr(
+        nl2sql_service,
+        "pipeline_from_config_with_adapter",
+        lambda path, *, adapter: make_pipeline(detector=DetectorBoom()),
+    )
+    service = nl2sql_service.NL2SQLService(Settings())
+    app.dependency_overrides[get_nl2sql_service] = lambda: service
+    try:
+        resp = client.post(
+            path,
+            json={"query": "select 1", "schema_preview": "CREATE TABLE t(x int);"},
+        )
+
+        assert resp.status_code == 500, resp.text
+        error = resp.json()["error"]
+        assert error["code"] == "pipeline_run_error"
+        assert error["message"] == "pipeline crashed during execution"
+        assert error["details"] is None
+        assert "secret" not in resp.text
+    finally:
+        app.dependency_overrides.pop(get_nl2sql_service, None)
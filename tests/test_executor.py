@@ -56,3 +56,64 @@ def test_executor_returns_error_on_missing_table(tmp_path):
 
     assert not res.ok
     assert res.error is not None
+
+
+def test_coalescing_adapter_shares_inflight_query(tmp_path):
+    """Concurrent identical SELECTs should hit the DB once."""
+    import threading
+    import time
+
+    from adapters.db.coalescing import CoalescingDBAdapter
+
+    db_path = tmp_path / "test.db"
+    _make_db(db_path)
+    inner = SQLiteAdapter(str(db_path))
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    real_execute = inner.execute
+
+    def slow_execute(sql):
+        calls.append(sql)
+        started.set()
+        release.wait(timeout=5)
+        return real_execute(sql)
+
+    inner.execute = slow_execute  # type: ignore[method-assign]
+    db = CoalescingDBAdapter(inner)
+    sql = "SELECT id, name FROM users;"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(db.execute(sql)))]
+    threads[0].start()
+    assert started.wait(timeout=5)
+    threads.append(threading.Thread(target=lambda: results.append(db.execute(sql))))
+    threads[1].start()
+    time.sleep(0.05)  # let the follower block on the in-flight query
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [([(1, "Alice")], ["id", "name"])] * 2
+    # The follower gets its own lists, never the leader's.
+    assert results[0][0] is not results[1][0]
+    assert db._inflight == {}
+    assert db.path == inner.path
+
+
+def test_service_shares_one_coalescing_adapter_per_database(tmp_path, monkeypatch):
+    from adapters.db.coalescing import CoalescingDBAdapter
+    from app.services.nl2sql_service import NL2SQLService
+    from app.settings import Settings
+
+    a, b = tmp_path / "a.db", tmp_path / "b.db"
+    _make_db(a)
+    _make_db(b)
+    monkeypatch.delenv("DEFAULT_SQLITE_PATH", raising=False)
+
+    first = NL2SQLService(Settings(default_sqlite_path=str(a)))._select_adapter(None)
+    again = NL2SQLService(Settings(default_sqlite_path=str(a)))._select_adapter(None)
+    other = NL2SQLService(Settings(default_sqlite_path=str(b)))._select_adapter(None)
+
+    assert isinstance(first, CoalescingDBAdapter)
+    assert again is first
+    assert other is not first and other.path == b.resolve()
@@ -33,3 +33,13 @@ def test_metrics_exposes_prometheus_format():
     # Ensure we have at least one sample line (a metric name + value)
     # This is a loose heuristic: any line that starts with a letter likely is a metric sample.
     assert any(line and line[0].isalpha() for line in body.splitlines())
+
+
+def test_app_shutdown_releases_stage_pool():
+    from nl2sql import pipeline as pipeline_mod
+
+    with TestClient(app):
+        pipeline_mod.Pipeline._get_pool()
+        assert pipeline_mod._STAGE_POOL is not None
+
+    assert pipeline_mod._STAGE_POOL is None
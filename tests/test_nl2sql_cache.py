@@ -0,0 +1,310 @@
+from nl2sql.cache import TTLCache
+from nl2sql.pipeline import Pipeline
+from nl2sql.safety import Safety
+from nl2sql.types import StageResult
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("nl2sql.cache.time.monotonic", lambda: now[0])
+
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=5.0)
+    cache["a"] = 1
+    assert cache.get("a") == 1
+
+    now[0] += 6.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_oldest_when_full():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60.0)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["c"] = 3
+
+    assert "a" not in cache
+    assert sorted(cache) == ["b", "c"]
+
+
+class CountingDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, *a, **k):
+        self.calls += 1
+        return ["The term 'top' is ambiguous in this query."]
+
+
+class GeneratorDelete:
+    def run(self, *a, **k):
+        return StageResult(ok=True, data={"sql": "DELETE FROM t", "rationale": "x"})
+
+
+class CountingSafety(Safety):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def run(self, *, sql):
+        self.calls += 1
+        return super().run(sql=sql)
+
+
+def test_pipeline_reject_cache_reuses_detector_questions(make_pipeline):
+    detector = CountingDetector()
+    p = make_pipeline(detector=detector, reject_cache=TTLCache())
+
+    first = p.run(user_query="top albums", schema_preview="s")
+    assert first.questions is not None
+    first.questions.append("INJECTED")  # callers may mutate their response
+    out = p.run(user_query="top albums", schema_preview="s")
+
+    assert detector.calls == 1
+    assert out.ambiguous is True
+    assert out.questions == ["The term 'top' is ambiguous in this query."]
+    assert out.traces[0]["summary"] == "cached-reject"
+
+
+def test_pipeline_detector_cache_memoizes_clear_queries(make_pipeline):
+    from nl2sql.cache import LRUCache
+
+    p = make_pipeline(detector_cache=LRUCache(maxsize=16))
+
+    p.run(user_query="count albums", schema_preview="s")
+    out = p.run(user_query="count albums", schema_preview="s")
+    p.run(user_query="count albums", schema_preview="other")
+
+    assert p.detector.calls == 2
+    assert out.ok is True
+    assert out.traces[0]["summary"] == "clear"
+    assert out.traces[0]["notes"]["cache"] == "hit"
+
+
+def test_pipeline_detector_cache_serves_clarify_round_trip(make_pipeline):
+    from nl2sql.cache import LRUCache
+
+    detector = CountingDetector()
+    p = make_pipeline(detector=detector, detector_cache=LRUCache(maxsize=16))
+
+    first = p.run(user_query="top albums", schema_preview="s")
+    assert first.ambiguous is True
+    assert first.questions is not None
+
+    answers = {first.questions[0]: "by sales"}
+    second = p.run(user_query="top albums", schema_preview="s", clarify_answers=answers)
+
+    assert detector.calls == 1
+    assert second.ambiguous is False
+    assert second.ok is True
+
+
+def test_pipeline_reject_cache_reuses_safety_rejection(make_pipeline):
+    safety = CountingSafety()
+    p = make_pipeline(
+        generator=GeneratorDelete(), safety=safety, reject_cache=TTLCache()
+    )
+
+    first = p.run(user_query="remove rows", schema_preview="s")
+    second = p.run(user_query="remove rows", schema_preview="s")
+
+    assert safety.calls == 1
+    assert first.ok is False and second.ok is False
+    assert second.error_code == first.error_code
+    safety_trace = next(t for t in second.traces if t["stage"] == "safety")
+    assert safety_trace["summary"] == "cached-reject"
+
+
+def test_pipeline_reject_cache_skips_stage_exceptions(make_pipeline):
+    class FlakySafety(Safety):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def run(self, *, sql):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("transient")
+            return super().run(sql=sql)
+
+    safety = FlakySafety()
+    reject_cache: TTLCache = TTLCache()
+    p = make_pipeline(safety=safety, reject_cache=reject_cache)
+
+    first = p.run(user_query="q", schema_preview="s")
+    second = p.run(user_query="q", schema_preview="s")
+
+    assert first.ok is False and first.details == ["transient"]
+    assert second.ok is True
+    assert safety.calls == 2
+    assert len(reject_cache) == 0
+
+
+def test_pipeline_cache_dir_survives_new_instances(tmp_path, make_pipeline):
+    from nl2sql.cache import close_shared_caches
+
+    safety = CountingSafety()
+    p1 = make_pipeline(safety=safety, cache_dir=str(tmp_path))
+    p1.run(user_query="q", schema_preview="s")
+
+    # Pipelines in one process share the open cache file.
+    p2 = make_pipeline(safety=safety, cache_dir=str(tmp_path))
+    assert p2.persistent_stage_cache is p1.persistent_stage_cache
+
+    # After a restart (caches closed and reopened) safety results are still
+    # there; the pipeline itself re-runs, since final results aren't persisted.
+    close_shared_caches()
+    p3 = make_pipeline(safety=safety, cache_dir=str(tmp_path))
+    second = p3.run(user_query="q", schema_preview="s")
+    close_shared_caches()
+
+    assert p3.result_cache is None and p3.stage_cache is None
+    assert safety.calls == 1
+    assert second.ok is True
+    safety_trace = next(t for t in second.traces if t["stage"] == "safety")
+    assert safety_trace["notes"] == {"cache": "hit"}
+
+
+def test_pipeline_cache_dir_never_shares_rows_across_databases(tmp_path, make_pipeline):
+    from nl2sql.cache import close_shared_caches
+
+    class RowsExec:
+        def __init__(self, name):
+            self.name = name
+
+        def run(self, *, sql):
+            return StageResult(ok=True, data={"rows": [(self.name,)]})
+
+    a = make_pipeline(executor=RowsExec("alice"), cache_dir=str(tmp_path))
+    b = make_pipeline(executor=RowsExec("bob"), cache_dir=str(tmp_path))
+
+    assert a.run(user_query="q", schema_preview="s").result == {"rows": [("alice",)]}
+    assert b.run(user_query="q", schema_preview="s").result == {"rows": [("bob",)]}
+    close_shared_caches()
+
+
+def test_sqlite_cache_is_shared_across_connections_and_namespaced(tmp_path):
+    from nl2sql.cache import SQLiteCache
+
+    path = str(tmp_path / "stages.sqlite3")
+    writer: SQLiteCache[tuple, StageResult] = SQLiteCache(path, namespace="1")
+    key = ("safety", b"\x00\xff")
+    writer[key] = StageResult(ok=True, data={"sql": "SELECT 1"})
+
+    reader: SQLiteCache[tuple, StageResult] = SQLiteCache(path, namespace="1")
+    assert reader[key].data == {"sql": "SELECT 1"}
+    assert list(reader) == [key]
+    assert len(reader) == 1
+
+    other: SQLiteCache[tuple, StageResult] = SQLiteCache(path, namespace="2")
+    assert other.get(key) is None
+
+    del reader[key]
+    assert writer.get(key) is None
+    for c in (writer, reader, other):
+        c.close()
+
+
+def test_pipeline_cache_dir_persists_only_safety_results(tmp_path, make_pipeline):
+    from nl2sql.cache import SQLiteCache, close_shared_caches
+
+    p = make_pipeline(safety=Safety(), cache_dir=str(tmp_path))
+    p.run(user_query="q", schema_preview="s")
+
+    assert isinstance(p.persistent_stage_cache, SQLiteCache)
+    assert {stage for stage, _ in p.persistent_stage_cache} == {"safety"}
+    close_shared_caches()
+
+
+def test_sqlite_cache_evicts_oldest_past_max_entries(tmp_path):
+    from nl2sql.cache import SQLiteCache
+
+    cache: SQLiteCache[str, int] = SQLiteCache(
+        str(tmp_path / "c.sqlite3"), max_entries=2
+    )
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"] = 3  # re-insert: now the newest
+    cache["c"] = 4
+
+    assert sorted(cache) == ["a", "c"]
+    assert cache["a"] == 3
+    cache.close()
+
+
+def test_pipeline_stage_cache_keys_include_llm_model(make_pipeline):
+    class Llm:
+        def __init__(self, model):
+            self.model = model
+
+    class ModelPlanner:
+        def __init__(self, model):
+            self.llm = Llm(model)
+            self.calls = 0
+
+        def run(self, *, user_query, schema_preview):
+            self.calls += 1
+            return StageResult(ok=True, data={"plan": "p"})
+
+    stage_cache: dict = {}
+    old, new, same = ModelPlanner("m-1"), ModelPlanner("m-2"), ModelPlanner("m-2")
+    for planner in (old, new, same):
+        make_pipeline(planner=planner, stage_cache=stage_cache).run(user_query="q")
+
+    assert (old.calls, new.calls, same.calls) == (1, 1, 0)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    from nl2sql.cache import LRUCache
+
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # touch "a" so "b" is now the oldest
+    cache["c"] = 3
+
+    assert sorted(cache) == ["a", "c"]
+
+
+def test_pipeline_exact_plan_cache_skips_planner_and_generator(make_pipeline):
+    from nl2sql.cache import LRUCache
+
+    p = make_pipeline(safety=Safety(), exact_plan_cache=LRUCache(maxsize=8))
+
+    p.run(user_query="q", schema_preview="s")
+    out = p.run(user_query="q", schema_preview="s")
+    p.run(user_query="q", schema_preview="s", clarify_answers={"a": 1})
+
+    assert p.planner.calls == 2
+    assert p.detector.calls == 2
+    assert out.ok is True
+    assert out.traces[0]["summary"] == "skipped_cache_hit"
+    gen_trace = next(t for t in out.traces if t["stage"] == "generator")
+    assert gen_trace["notes"] == {"cache": "exact_hit"}
+
+
+def test_pipeline_plan_cache_skips_unverified_sql(make_pipeline):
+    from nl2sql.cache import LRUCache
+
+    class VerifierRejects:
+        def run(self, *, sql, exec_result):
+            return StageResult(ok=True, data={"verified": False})
+
+    exact: LRUCache = LRUCache(maxsize=8)
+    p = make_pipeline(verifier=VerifierRejects(), exact_plan_cache=exact)
+
+    out = p.run(user_query="q", schema_preview="s")
+    p.run(user_query="q", schema_preview="s")
+
+    assert out.ok is True and out.verified is True  # verification not required
+    assert len(exact) == 0
+    assert p.planner.calls == 2
+
+
+def test_result_cache_key_ignores_spacing_and_trailing_punctuation():
+    from nl2sql.cache import normalize_query
+
+    assert normalize_query("  List  all artists ?! ") == "List all artists"
+    key = Pipeline._result_cache_key
+    assert key("List all artists?", "s", None) == key("List  all artists", "s", {})
+    assert key("Named 'Smith'", "s", None) != key("named 'smith'", "s", None)
@@ -1,34 +1,10 @@
+import pytest
+
 from nl2sql.pipeline import Pipeline
 from nl2sql.types import StageResult
 from nl2sql.errors.codes import ErrorCode
 
 
-class DetectorOK:
-    def detect(self, *a, **k):
-        return []
-
-
-class PlannerOK:
-    def run(self, *a, **k):
-        return StageResult(ok=True, data={"plan": "p"})
-
-
-class GeneratorOK:
-    def run(self, *a, **k):
-        return StageResult(ok=True, data={"sql": "SELECT * FROM t", "rationale": "ok"})
-
-
-class SafetyOK:
-    def run(self, *a, **k):
-        sql = k.get("sql", "SELECT * FROM t")
-        return StageResult(ok=True, data={"sql": sql})
-
-
-class ExecOK:
-    def run(self, *a, **k):
-        return StageResult(ok=True, data={"rows": [{"x": 1}]})
-
-
 class VerifierThenOK:
     """First call fails, second call passes (after repair)."""
 
@@ -62,16 +38,11 @@ class RepairOK:
         return StageResult(ok=True, data={"sql": "SELECT * FROM t LIMIT 1"})
 
 
-def test_pipeline_repair_success_path():
+def test_pipeline_repair_success_path(make_pipeline):
     verifier = VerifierThenOK()
     repair = RepairOK()
 
-    p = Pipeline(
-        detector=DetectorOK(),
-        planner=PlannerOK(),
-        generator=GeneratorOK(),
-        safety=SafetyOK(),
-        executor=ExecOK(),
+    p = make_pipeline(
         verifier=verifier,
         repair=repair,
     )
@@ -93,3 +64,486 @@ def test_pipeline_repair_success_path():
     # Ensure the failing verifier message was passed into repair
     assert repair.last_error_msg is not None
     assert "first verify fail" in repair.last_error_msg
+
+
+class PlannerBoom:
+    def run(self, *a, **k):
+        raise RuntimeError("planner exploded")
+
+
+def test_pipeline_stage_exception_details_are_strings(monkeypatch, make_pipeline):
+    monkeypatch.setenv("NL2SQL_DEBUG_TB", "1")
+    p = make_pipeline(
+        planner=PlannerBoom(),
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is False
+    assert out.details is not None
+    assert all(isinstance(d, str) for d in out.details)
+    assert out.details[0] == "planner exploded"
+    assert "Traceback" in out.details[1]
+
+
+def test_safe_stage_keeps_traceback_out_of_errors(monkeypatch, make_pipeline):
+    monkeypatch.setenv("NL2SQL_DEBUG_TB", "1")
+    r = make_pipeline()._safe_stage(PlannerBoom().run)
+
+    assert r.error == ["planner exploded"]
+    assert "Traceback" in str(r.traceback)
+    assert "; ".join(r.error) == "planner exploded"
+
+
+def test_pipeline_stage_exception_omits_traceback_by_default(
+    monkeypatch, make_pipeline
+):
+    monkeypatch.delenv("NL2SQL_DEBUG_TB", raising=False)
+    p = make_pipeline(
+        planner=PlannerBoom(),
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is False
+    assert out.details == ["planner exploded"]
+
+
+def test_repair_input_omits_debug_tracebacks():
+    from nl2sql.pipeline import LazyTraceback
+
+    build = Pipeline._make_repair_input_builder("stage_failed", lambda r, kw: "")
+    failed = StageResult(
+        ok=False, error=["no such table: t"], traceback=LazyTraceback(RuntimeError("x"))
+    )
+
+    assert build(failed, {})["error_msg"] == "no such table: t"
+    assert build(StageResult(ok=False), {})["error_msg"] == "stage_failed"
+
+
+def test_pipeline_run_skips_signature_probing_for_production_stages(
+    monkeypatch, tmp_path, make_pipeline
+):
+    import inspect
+    import sqlite3
+
+    from adapters.db.sqlite_adapter import SQLiteAdapter
+    from nl2sql.executor import Executor
+    from nl2sql.generator import Generator
+    from nl2sql.planner import Planner
+    from nl2sql.safety import Safety
+    from nl2sql.verifier import Verifier
+
+    class LLM:
+        def plan(self, *, user_query, schema_preview):
+            return "p", 1, 1, 0.0
+
+        def generate_sql(self, **k):
+            return "SELECT id FROM users", "r", ["users"], 1, 1, 0.0
+
+    db_path = str(tmp_path / "t.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE users(id INTEGER)")
+    p = make_pipeline(
+        planner=Planner(llm=LLM()),
+        generator=Generator(llm=LLM()),
+        safety=Safety(),
+        executor=Executor(SQLiteAdapter(db_path)),
+        verifier=Verifier(),
+    )
+
+    probed = []
+    signature = inspect.signature
+    monkeypatch.setattr(
+        "nl2sql.pipeline.inspect.signature",
+        lambda fn: probed.append(fn) or signature(fn),
+    )
+    out = p.run(user_query="ids", schema_preview="CREATE TABLE users(id INTEGER)")
+
+    assert out.ok is True
+    assert probed == []
+
+
+def test_pipeline_flushes_stage_durations_once_per_run(
+    make_pipeline, recording_metrics
+):
+    metrics = recording_metrics
+    p = make_pipeline(metrics=metrics)
+
+    p.run(user_query="?", schema_preview="")
+
+    assert len(metrics.batches) == 1
+    stages = [stage for stage, _ in metrics.batches[0]]
+    assert stages[0] == "detector"
+    assert stages[-1] == "pipeline_total"
+    assert "executor" in stages
+
+
+def test_pipeline_result_cache_short_circuits_repeat_queries(make_pipeline):
+    cache: dict = {}
+    p = make_pipeline(
+        result_cache=cache,
+    )
+
+    first = p.run(user_query="q", schema_preview="s")
+    second = p.run(user_query="q", schema_preview="s")
+    p.run(user_query="q", schema_preview="other")
+
+    assert p.planner.calls == 2
+    assert len(cache) == 2
+    assert second.sql == first.sql
+    assert second.result == first.result
+    assert [t["stage"] for t in second.traces] == ["pipeline"]
+    assert second.traces[0]["notes"] == {"cache": "hit"}
+
+
+def test_pipeline_result_cache_is_isolated_from_caller_mutation(make_pipeline):
+    p = make_pipeline(result_cache={})
+
+    first = p.run(user_query="q", schema_preview="s")
+    assert first.result is not None
+    first.result["rows"].append({"x": 2})
+
+    second = p.run(user_query="q", schema_preview="s")
+    assert second.result == {"rows": [{"x": 1}]}
+    assert second.result is not None
+    second.result["rows"].clear()
+
+    assert p.run(user_query="q", schema_preview="s").result == {"rows": [{"x": 1}]}
+
+
+def test_pipeline_counts_cache_hits(make_pipeline, recording_metrics):
+    metrics = recording_metrics
+    p = make_pipeline(
+        metrics=metrics,
+        stage_cache={},
+    )
+
+    p.run(user_query="q", schema_preview="s")
+    assert metrics.hits == []
+    p.run(user_query="q", schema_preview="s")
+    assert metrics.hits == ["stage", "stage", "stage"]
+
+
+def test_pipeline_result_cache_skips_failed_runs(make_pipeline):
+    cache: dict = {}
+    p = make_pipeline(
+        planner=PlannerBoom(),
+        result_cache=cache,
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is False
+    assert cache == {}
+
+
+def test_pipeline_stage_cache_reuses_planner_across_clarify_answers(make_pipeline):
+    p = make_pipeline(
+        stage_cache={},
+    )
+
+    p.run(user_query="q", schema_preview="s", clarify_answers={"a": 1})
+    out = p.run(user_query="q", schema_preview="s", clarify_answers={"a": 2})
+
+    assert out.ok is True
+    assert p.planner.calls == 1
+    planner_trace = next(t for t in out.traces if t["stage"] == "planner")
+    assert planner_trace["notes"] == {"cache": "hit"}
+
+
+def test_pipeline_run_many_preserves_order(make_pipeline):
+    class EchoGenerator:
+        def run(self, *, user_query, **k):
+            return StageResult(ok=True, data={"sql": f"SELECT '{user_query}'"})
+
+    p = make_pipeline(
+        generator=EchoGenerator(),
+        result_cache={},
+    )
+
+    items = [{"user_query": f"q{i}", "schema_preview": "s"} for i in range(10)]
+    outs = p.run_many(items + items, max_workers=4)
+
+    assert [o.sql for o in outs] == [f"SELECT 'q{i}'" for i in range(10)] * 2
+    assert all(o.ok for o in outs)
+
+
+def test_pipeline_run_many_runs_duplicate_items_once(make_pipeline):
+    p = make_pipeline()
+
+    item = {"user_query": "q", "schema_preview": "s"}
+    outs = p.run_many([item, dict(item), {**item, "schema_preview": "t"}])
+
+    assert p.planner.calls == 2
+    assert outs[0] == outs[1]
+    # Repeats are copies: mutating one response never touches another.
+    assert outs[0] is not outs[1]
+    assert outs[0].traces is not outs[1].traces
+    assert all(o.ok for o in outs)
+
+
+def test_pipeline_traces_carry_stage_token_usage(make_pipeline):
+    from nl2sql.types import StageTrace
+
+    class PlannerWithUsage:
+        def run(self, *a, **k):
+            return StageResult(
+                ok=True,
+                data={"plan": "p"},
+                trace=StageTrace(
+                    stage="planner",
+                    duration_ms=3.0,
+                    token_in=10,
+                    token_out=5,
+                    cost_usd=0.001,
+                ),
+            )
+
+    p = make_pipeline(
+        planner=PlannerWithUsage(),
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    planner_trace = next(t for t in out.traces if t["stage"] == "planner")
+    assert planner_trace["token_in"] == 10
+    assert planner_trace["token_out"] == 5
+    assert planner_trace["cost_usd"] == 0.001
+    detector_trace = out.traces[0]
+    assert "token_in" not in detector_trace
+
+
+def test_content_key_is_order_independent():
+    k1 = Pipeline._content_key({"a": 1, "b": [1, 2], "c": {"x": 1, "y": 2}})
+    k2 = Pipeline._content_key({"c": {"y": 2, "x": 1}, "b": [1, 2], "a": 1})
+
+    assert k1 == k2
+    assert len(k1) == 16
+    assert Pipeline._content_key({"a": 2}) != Pipeline._content_key({"a": 1})
+
+
+def test_canonical_json_stringifies_mixed_keys():
+    from nl2sql.pipeline import _canonical_json
+
+    out = _canonical_json([{1: "x", "b": {2: "é"}}, ("t",)])
+
+    assert out == '[{"1":"x","b":{"2":"é"}},["t"]]'.encode("utf-8")
+    assert Pipeline._result_cache_key("q", "s", {1: "a", "b": 2}) == (
+        Pipeline._result_cache_key("q", "s", {"b": 2, "1": "a"})
+    )
+
+
+@pytest.mark.parametrize(
+    "fixed_sql, reason",
+    [("SELECT * FROM t", "identical_sql"), ("", "empty_sql"), (None, "empty_sql")],
+)
+def test_pipeline_repair_stops_without_progress(fixed_sql, reason, make_pipeline):
+    class ExecNoTable:
+        def __init__(self):
+            self.calls = 0
+
+        def run(self, *, sql):
+            self.calls += 1
+            return StageResult(ok=False, error=["no such table: t"])
+
+    class RepairSameSQL:
+        def run(self, *, sql, error_msg, schema_preview):
+            return StageResult(ok=True, data={"sql": fixed_sql})
+
+    executor = ExecNoTable()
+    p = make_pipeline(
+        executor=executor,
+        repair=RepairSameSQL(),
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is False
+    assert executor.calls == 1
+    stalled = [t for t in out.traces if t["summary"] == "no-progress"]
+    assert [t["notes"]["reason"] for t in stalled] == [reason]
+
+
+def test_final_result_pickles(make_pipeline):
+    import pickle
+
+    p = make_pipeline()
+    out = p.run(user_query="?", schema_preview="")
+
+    assert pickle.loads(pickle.dumps(out)) == out
+
+
+def test_pipeline_run_async_matches_run(make_pipeline):
+    import asyncio
+
+    p = make_pipeline()
+
+    async def main():
+        return await asyncio.gather(
+            p.run_async(user_query="a", schema_preview=""),
+            p.run_async(user_query="b", schema_preview=""),
+        )
+
+    outs = asyncio.run(main())
+
+    assert [o.ok for o in outs] == [True, True]
+    assert all(o.sql == "SELECT * FROM t" for o in outs)
+
+
+def test_pipeline_unsampled_runs_return_no_traces(make_pipeline):
+    p = make_pipeline(
+        trace_sample_rate=0.0,
+    )
+
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is True
+    assert out.traces == []
+
+    with pytest.raises(ValueError):
+        make_pipeline(
+            trace_sample_rate=1.5,
+        )
+
+
+def test_pipeline_detector_exception_propagates(make_pipeline, recording_metrics):
+    class DetectorBoom:
+        def detect(self, *a, **k):
+            raise RuntimeError("detector down")
+
+    p = make_pipeline(
+        detector=DetectorBoom(),
+        metrics=recording_metrics,
+    )
+    with pytest.raises(RuntimeError, match="detector down"):
+        p.run(user_query="?", schema_preview="")
+
+    assert ("detector", False) in recording_metrics.stage_calls
+
+
+def test_pipeline_parallel_stages_overlaps_static_verifier(make_pipeline):
+    import threading
+
+    verifier_started = threading.Event()
+
+    class StaticVerifier:
+        needs_exec_result = False
+
+        def run(self, *, sql, exec_result):
+            verifier_started.set()
+            return StageResult(ok=True, data={"verified": True})
+
+    class ExecWaitsForVerifier:
+        def run(self, *a, **k):
+            overlapped = verifier_started.wait(timeout=5)
+            return StageResult(ok=overlapped, data={"rows": []}, error=["serial"])
+
+    p = make_pipeline(
+        executor=ExecWaitsForVerifier(),
+        verifier=StaticVerifier(),
+        parallel_stages=True,
+    )
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is True and out.verified is True
+    stages = [t["stage"] for t in out.traces]
+    assert stages.index("executor") < stages.index("verifier")
+
+
+def test_stage_pool_honours_env_and_can_be_shut_down(monkeypatch):
+    from nl2sql import pipeline as pipeline_mod
+
+    monkeypatch.setenv("NL2SQL_POOL_WORKERS", "2")
+    assert pipeline_mod._pool_workers_from_env() == 2
+    monkeypatch.delenv("NL2SQL_POOL_WORKERS")
+    assert pipeline_mod._pool_workers_from_env() == 64
+    for bad in ("0", "-3", "four"):
+        monkeypatch.setenv("NL2SQL_POOL_WORKERS", bad)
+        with pytest.raises(ValueError):
+            pipeline_mod._pool_workers_from_env()
+
+    pipeline_mod.shutdown_stage_pool()
+    monkeypatch.setattr(pipeline_mod, "_POOL_WORKERS", 2)
+    try:
+        pool = Pipeline._get_pool()
+        assert pool._max_workers == 2
+        assert Pipeline._get_pool() is pool
+
+        pipeline_mod.shutdown_stage_pool()
+        assert Pipeline._get_pool() is not pool
+    finally:
+        # Don't leave later tests a process-wide pool sized by the patch.
+        pipeline_mod.shutdown_stage_pool()
+
+
+def test_pipeline_discarded_speculative_stages_leave_no_trace(
+    make_pipeline, recording_metrics
+):
+    import threading
+
+    verifier_done = threading.Event()
+
+    class StaticVerifierRejects:
+        needs_exec_result = False
+
+        def run(self, *, sql, exec_result):
+            verifier_done.set()
+            return StageResult(ok=True, data={"verified": False})
+
+    class ExecFailsAfterVerifier:
+        def run(self, *a, **k):
+            verifier_done.wait(timeout=5)
+            return StageResult(ok=False, error=["permission denied"])
+
+    class CountingRepair:
+        calls = 0
+
+        def run(self, *, sql, error_msg, schema_preview):
+            CountingRepair.calls += 1
+            return StageResult(ok=True, data={"sql": sql})
+
+    p = make_pipeline(
+        executor=ExecFailsAfterVerifier(),
+        verifier=StaticVerifierRejects(),
+        repair=CountingRepair(),
+        metrics=recording_metrics,
+        parallel_stages=True,
+    )
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ok is False
+    assert CountingRepair.calls == 0
+    assert all(stage != "verifier" for stage, _ in recording_metrics.stage_calls)
+    assert all(stage != "verifier" for stage, _ in recording_metrics.batches[0])
+    assert all(t["stage"] != "verifier" for t in out.traces)
+
+
+def test_pipeline_discarded_speculative_planner_is_not_recorded(
+    make_pipeline, recording_metrics
+):
+    import threading
+
+    planner_done = threading.Event()
+
+    class SignallingPlanner:
+        def run(self, *a, **k):
+            planner_done.set()
+            return StageResult(ok=True, data={"plan": "p"})
+
+    class AmbiguousAfterPlanner:
+        def detect(self, *a, **k):
+            planner_done.wait(timeout=5)
+            return ["Which year?"]
+
+    p = make_pipeline(
+        detector=AmbiguousAfterPlanner(),
+        planner=SignallingPlanner(),
+        metrics=recording_metrics,
+        parallel_stages=True,
+    )
+    out = p.run(user_query="?", schema_preview="")
+
+    assert out.ambiguous is True
+    assert all(stage != "planner" for stage, _ in recording_metrics.stage_calls)
+    assert all(stage != "planner" for stage, _ in recording_metrics.batches[0])
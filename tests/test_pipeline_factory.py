@@ -47,3 +47,30 @@ def test_full_pipeline_from_yaml():
     assert isinstance(res.sql, str)
 
     assert any("executor" in t.get("stage", "") for t in res.traces)
+
+
+def test_pipeline_from_config_parallel_stages_flag(tmp_path):
+    cfg = yaml.safe_load(config_path.read_text())
+    cfg["parallel_stages"] = True
+    path = tmp_path / "pipeline.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+
+    p = pipeline_from_config(str(path))
+    assert p.parallel_stages is True
+
+    res = p.run(user_query="List all artists")
+    assert res.ok
+    assert [t["stage"] for t in res.traces][:2] == ["detector", "planner"]
+
+
+def test_pipeline_factory_shares_persistent_caches(tmp_path, monkeypatch):
+    from nl2sql.cache import SQLiteCache, close_shared_caches
+
+    monkeypatch.setenv("NL2SQL_CACHE_DIR", str(tmp_path))
+    p1 = pipeline_from_config(CONFIG_PATH)
+    p2 = pipeline_from_config(CONFIG_PATH)
+
+    assert isinstance(p1.persistent_stage_cache, SQLiteCache)
+    assert p2.persistent_stage_cache is p1.persistent_stage_cache
+    assert p1.result_cache is None and p1.stage_cache is None
+    close_shared_caches()
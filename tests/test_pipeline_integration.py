@@ -214,3 +214,43 @@ def test_pipeline_safety_fail():
     assert r.ok is False
     assert r.error is True
     assert r.error_code == ErrorCode.SAFETY_NON_SELECT
+
+
+# ---------------------------------------------------------------------------
+# 6) Parallel detector + planner
+# ---------------------------------------------------------------------------
+
+
+def test_pipeline_parallel_stages_success():
+    pipeline = Pipeline(
+        detector=DummyDetector(ambiguous=False),
+        planner=DummyPlanner(),
+        generator=DummyGenerator(),
+        safety=DummySafety(),
+        parallel_stages=True,
+    )
+
+    r = pipeline.run(
+        user_query="show all singers",
+        schema_preview="CREATE TABLE singer(id int, name text);",
+    )
+
+    assert r.ok is True
+    stages = [t["stage"] for t in r.traces]
+    # planner trace is merged after the detector trace
+    assert stages.index("detector") < stages.index("planner")
+
+
+def test_pipeline_parallel_stages_ambiguous():
+    pipeline = Pipeline(
+        detector=DummyDetector(ambiguous=True),
+        planner=DummyPlanner(),
+        generator=DummyGenerator(),
+        safety=DummySafety(),
+        parallel_stages=True,
+    )
+
+    r = pipeline.run(user_query="show data", schema_preview="CREATE TABLE x(id int);")
+
+    assert r.ambiguous is True
+    assert all(t["stage"] != "planner" for t in r.traces)
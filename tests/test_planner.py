@@ -123,3 +123,14 @@ def test_planner_falls_back_gracefully_on_trimming_error(monkeypatch):
     assert result["plan"] == "PLAN(anything)"
     assert result["used_tables"] == ["users"]
     assert "usage" in result
+
+
+def test_extract_table_names_dedups_and_returns_fresh_lists():
+    from nl2sql.planner import _extract_table_names_from_schema
+
+    schema = "CREATE TABLE a(x);\ncreate table `b`(y);\nCREATE TABLE a(z);"
+    first = _extract_table_names_from_schema(schema)
+    first.append("mutated")
+
+    assert _extract_table_names_from_schema(schema) == ["a", "b"]
+    assert _extract_table_names_from_schema("") == []
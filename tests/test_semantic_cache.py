@@ -0,0 +1,140 @@
+from nl2sql.semantic_cache import SemanticCache, hashed_ngram_embedding
+
+VOCAB = ["sales", "last", "month", "year", "show", "what", "were", "me"]
+
+
+def bag_of_words(text: str) -> list[float]:
+    words = text.lower().replace("?", "").split()
+    return [float(words.count(w)) for w in VOCAB]
+
+
+def test_semantic_cache_matches_paraphrase_within_scope():
+    cache: SemanticCache[str] = SemanticCache(bag_of_words, threshold=0.55)
+    vec = cache.embed("show me sales last month")
+    assert vec is not None
+    cache.put("scope-a", vec, "result")
+
+    near = cache.embed("what were sales last month")
+    assert near is not None
+    found = cache.get("scope-a", near)
+    assert found is not None
+    assert found[0] == "result"
+
+    # Same wording, different scope → miss
+    assert cache.get("scope-b", vec) is None
+
+
+def test_semantic_cache_respects_threshold():
+    cache: SemanticCache[str] = SemanticCache(bag_of_words, threshold=0.99)
+    vec = cache.embed("sales last month")
+    other = cache.embed("sales last year")
+    assert vec is not None and other is not None
+    cache.put("s", vec, "month")
+
+    assert cache.get("s", other) is None
+
+
+def test_semantic_cache_evicts_oldest():
+    cache: SemanticCache[str] = SemanticCache(bag_of_words, max_entries=1)
+    a = cache.embed("sales")
+    b = cache.embed("month")
+    assert a is not None and b is not None
+    cache.put("s", a, "a")
+    cache.put("s", b, "b")
+
+    assert cache.get("s", a) is None
+    found = cache.get("s", b)
+    assert found is not None and found[0] == "b"
+
+
+def test_pipeline_uses_semantic_cache_for_paraphrases(make_pipeline):
+    p = make_pipeline(semantic_cache=SemanticCache(bag_of_words, threshold=0.55))
+
+    first = p.run(user_query="show me sales last month", schema_preview="s")
+    second = p.run(user_query="what were sales last month", schema_preview="s")
+    p.run(user_query="what were sales last month", schema_preview="other")
+
+    assert p.planner.calls == 2
+    assert second.sql == first.sql
+    assert second.traces[0]["notes"]["cache"] == "semantic_hit"
+
+
+def test_hashed_ngram_embedding_ignores_spacing_but_keeps_case():
+    a = hashed_ngram_embedding("List all  Artists")
+
+    assert a == hashed_ngram_embedding("List all Artists")
+    assert a != hashed_ngram_embedding("list all artists")
+    assert len(a) == 256
+
+
+def test_semantic_cache_requires_identical_literals():
+    cache: SemanticCache[str] = SemanticCache(hashed_ngram_embedding, threshold=0.5)
+    stored = cache.embed("orders of customer 42 named 'Smith'")
+    assert stored is not None
+    cache.put("s", stored, "result")
+
+    for other in (
+        "orders of customer 43 named 'Smith'",
+        "orders of customer 42 named 'Smyth'",
+    ):
+        probe = cache.embed(other)
+        assert probe is not None
+        assert cache.get("s", probe) is None
+
+    same = cache.embed("orders for customer 42 named 'Smith'")
+    assert same is not None
+    assert cache.get("s", same) is not None
+
+
+def test_semantic_cache_requires_identical_direction_and_negation_words():
+    cache: SemanticCache[str] = SemanticCache(hashed_ngram_embedding, threshold=0.9)
+    stored_text = (
+        "List the names and emails of all customers who have not placed an "
+        "order, sorted by last name ascending"
+    )
+    stored = cache.embed(stored_text)
+    assert stored is not None
+    cache.put("s", stored, "result")
+
+    for other in (
+        stored_text.replace("ascending", "descending"),
+        stored_text.replace("have not", "have"),
+        stored_text.replace("last", "first"),
+    ):
+        probe = cache.embed(other)
+        assert probe is not None
+        assert cache.get("s", probe) is None
+
+    # Contractions count as "not"; apostrophes aren't quoted literals.
+    same = cache.embed(stored_text.replace("have not", "haven't") + "?")
+    assert same is not None
+    assert cache.get("s", same) is not None
+
+
+def test_semantic_cache_bounds_scopes():
+    cache: SemanticCache[str] = SemanticCache(bag_of_words, max_scopes=2)
+    vec = cache.embed("sales")
+    assert vec is not None
+    for scope in ("a", "b", "c"):
+        cache.put(scope, vec, scope)
+
+    assert cache.get("a", vec) is None
+    assert cache.get("c", vec) is not None
+
+
+def test_pipeline_plan_cache_skips_planner_and_generator_only(make_pipeline):
+    p = make_pipeline(plan_cache=SemanticCache(hashed_ngram_embedding, threshold=0.9))
+
+    first = p.run(user_query="list all artists", schema_preview="s")
+    second = p.run(user_query="list  all artists?", schema_preview="s")
+
+    assert p.detector.calls == 2  # paraphrases may be ambiguous; never skipped
+    assert p.planner.calls == 1
+    assert p.generator.calls == 1
+    assert p.executor.calls == 2
+    assert second.ok is True
+    assert second.sql == first.sql
+    cached = {t["stage"]: t for t in second.traces}
+    assert cached["detector"]["summary"] == "clear"
+    assert cached["planner"]["summary"] == "cache_hit"
+    assert cached["generator"]["notes"]["cache"] == "semantic_hit"
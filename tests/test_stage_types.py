@@ -61,3 +61,43 @@ def test_stage_trace_defaults_for_optional_fields():
     assert t.token_in is None
     assert t.token_out is None
     assert t.notes is None
+
+
+# ---------------------------------------------------------------------------
+# ACCEPTED_KWARGS must match the real `run` signatures
+# ---------------------------------------------------------------------------
+
+
+def test_accepted_kwargs_match_run_signatures():
+    import inspect
+
+    from nl2sql.executor import Executor
+    from nl2sql.generator import Generator
+    from nl2sql.planner import Planner
+    from nl2sql.repair import Repair
+    from nl2sql.safety import Safety
+    from nl2sql.stubs import NoOpExecutor, NoOpRepair, NoOpVerifier
+    from nl2sql.verifier import Verifier
+
+    for cls in (
+        Planner,
+        Generator,
+        Safety,
+        Executor,
+        Verifier,
+        Repair,
+        NoOpExecutor,
+        NoOpVerifier,
+        NoOpRepair,
+    ):
+        params = set(inspect.signature(cls.run).parameters) - {"self"}
+        assert cls.ACCEPTED_KWARGS == params, cls.__name__
+
+
+def test_stage_types_are_slotted_and_picklable():
+    import pickle
+
+    r = StageResult(ok=True, data={"sql": "SELECT 1"}, trace=StageTrace("s", 1.0))
+    assert not hasattr(r, "__dict__")
+    assert not hasattr(r.trace, "__dict__")
+    assert pickle.loads(pickle.dumps(r)) == r